@@ -8,7 +8,7 @@ This server provides intelligent text processing to enhance Live Paste accuracy.
 It runs as a persistent subprocess managed by the Electron main process.
 
 MODELS:
-- Fast (Qwen3-0.6B-4bit-MLX): Real-time operations (Phase 2, 3)
+- Fast (Qwen3-0.6B-3bit-MLX): Real-time operations (Phase 2, 3)
 - Quality (Qwen3-1.7B-4bit-MLX): Final polish (Phase 4)
 
 PHASES:
@@ -33,19 +33,51 @@ AUTO-INSTALLATION:
 """
 
 import sys
+import atexit
+import copy
+import gc
+import glob
 import json
+import functools
+import itertools
+import os
+import queue
+import re
+import threading
 import time
 import traceback
+from collections import OrderedDict
 from typing import Optional, Tuple, Any
 
+try:
+    import psutil  # Memory queries without forking vm_stat/sysctl
+except ImportError:
+    psutil = None
+
+try:
+    import orjson  # C JSON codec for the stdin/stdout protocol
+except ImportError:
+    orjson = None
+
+try:
+    import mlx.core as mx  # Metal cache control and prefix prefill
+except ImportError:
+    mx = None
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════════
 
 # Model identifiers from Hugging Face / MLX Community
-FAST_MODEL = "mlx-community/Qwen3-0.6B-4bit"
+# Fast model is on the real-time path where decode is memory-bandwidth bound:
+# 3-bit weights move ~25% fewer bytes per token than 4-bit
+FAST_MODEL = "mlx-community/Qwen3-0.6B-3bit"
+FAST_MODEL_FALLBACK = "mlx-community/Qwen3-0.6B-4bit"  # Used if the 3-bit build fails to load
 QUALITY_MODEL = "mlx-community/Qwen3-1.7B-4bit"  # Best balance of speed vs accuracy
 DEEP_MODEL = "mlx-community/Qwen3-4B-4bit"       # High accuracy for background cleanup
+# Long polish prompts make the 4B model's fp16 KV cache a few hundred MB;
+# 8-bit KV halves that (weights are already 4-bit)
+DEEP_KV_BITS = 8
 
 # Latency thresholds (ms)
 LATENCY_THRESHOLD_MERGE = 100
@@ -53,15 +85,114 @@ LATENCY_THRESHOLD_CORRECT = 200
 LATENCY_THRESHOLD_POLISH = 1000
 LATENCY_THRESHOLD_DEEP = 5000  # Deep cleanup can take longer (background)
 
+# Quality-model retries decode speculatively with the fast model as draft
+# (same Qwen3 tokenizer); the 1.7B model only verifies the drafted tokens
+SPECULATIVE_DRAFT_TOKENS = 4
+
+# Generation stops as soon as the model closes (or tries to open) a chat turn
+STOP_SEQUENCES = ("<|im_end|>", "<|im_start|>", "<|endoftext|>")
+STOP_LOOKBACK_CHARS = 16  # Stop strings can span streamed text segments
+# Merge/extract answers are a single line; a corrected sentence is one paragraph
+SINGLE_LINE_STOPS = ("\n",)
+PARAGRAPH_STOPS = ("\n\n",)
+
+# Response cache for real-time ops (rolling STT resends the same inputs while stabilizing)
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL_S = 30.0
+
+# Request batching: real-time commands arriving within this window share one generate call
+BATCH_WINDOW_S = 0.005
+BATCH_MAX_COMMANDS = 4
+BATCHABLE_ACTIONS = ("merge_text", "correct_sentence", "extract_new_words")
+
+# Available-memory readings are reused for this long
+MEMORY_CHECK_TTL_S = 1.0
+
+# Model state machine: real-time requests are the voice-activity signal.
+# Phase 4 and deep cleanup load the deep model on demand; the next real-time
+# request swaps back to real-time mode. Silence alone loads nothing (pauses
+# inside a dictation would evict the quality model and reload it on every
+# pause): after DEEP_READAHEAD_SILENCE_S without a request the deep model's
+# weight files are read into the page cache, once, so its first load doesn't
+# wait on a cold disk. All MLX work stays on the main loop (MLX streams are
+# bound to the creating thread), which checks for pending swaps every
+# SILENCE_WATCH_INTERVAL_S while idle.
+MODEL_STATE_REALTIME = "realtime"
+MODEL_STATE_TRANSITIONING = "transitioning"
+MODEL_STATE_DEEP = "deep"
+# Deep model loaded by the startup prewarm: real-time requests don't swap it
+# out, so it is still resident for Phase 4 after dictation
+MODEL_STATE_PINNED = "pinned"
+DEEP_READAHEAD_SILENCE_S = 2.0
+SILENCE_WATCH_INTERVAL_S = 0.25
+# Read size for pulling the deep model's weight files into the page cache
+DEEP_PREFETCH_READ_BYTES = 8 * 1024 * 1024
+# Set RIFT_PREWARM_DEEP=1 to load the deep model right after "ready" and keep
+# it resident (off by default for low-RAM machines). If QUALITY_MODEL_REQUIRED_GB
+# is still free once it's in, the quality model may load next to it on demand;
+# otherwise merge/extract skip the quality-model retry (it would evict the
+# pinned model), which is logged and reported by get_status.
+PREWARM_DEEP_ENV = "RIFT_PREWARM_DEEP"
+QUALITY_MODEL_REQUIRED_GB = 1.5
+
 # GPU contention tracking
 _fast_model_busy = False
 _last_fast_model_use = 0
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# PROMPT TEMPLATES (loaded from external config)
+# PRECOMPILED PATTERNS (post-processing runs on every LLM call)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-import os
+# _normalize_for_comparison / _quick_diff_check
+_PUNCT_CHARS = '.,!?;:\'"'
+_PUNCT_TABLE = str.maketrans('', '', _PUNCT_CHARS)
+_SUFFIX_LEAD_CHARS = ' ' + _PUNCT_CHARS
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+# normalize_output
+_WS_HORIZ = re.compile(r'[^\S\n]+')
+_SPACE_BEFORE_PUNCT = re.compile(r'\s+([.,!?;:])')
+_LINE_LEADING_WS = re.compile(r'^\s+', re.MULTILINE)
+_LINE_TRAILING_WS = re.compile(r'\s+$', re.MULTILINE)
+_MULTI_NL = re.compile(r'\n{3,}')
+_MULTI_DOT = re.compile(r'\.{2,}')
+_MULTI_COMMA = re.compile(r',{2,}')
+
+# sanitize_output
+_NO_THINK = re.compile(r'/no_think\s*', re.IGNORECASE)
+_THINK = re.compile(r'/think\s*', re.IGNORECASE)
+_IM_TOKENS = re.compile(r'<\|im_(?:start|end)\|>\s*')
+_ENDOFTEXT = re.compile(r'<\|endoftext\|>\s*')
+_LLM_PREFIX = re.compile(r'^(?:Answer|Output|Response|Result|Here[\'s ]* (?:the|your)):\s*', re.IGNORECASE)
+_MD_EMPHASIS = re.compile(r'\*{1,2}([^*]+)\*{1,2}')
+
+# _looks_suspicious: explanatory text, markdown, echoed prompt labels
+_SUSPICIOUS = re.compile(
+    r'answer:|output:|the new words|result:|here is|here are|\*\*|```|##|pasted:|new:',
+    re.IGNORECASE,
+)
+
+# _extract_looks_suspicious: explanatory text or markdown
+_EXTRACT_SUSPICIOUS = re.compile(r'answer:|the new words|result:|here is|\*\*|```', re.IGNORECASE)
+
+# _clean_merge_result / _clean_extract_result
+_ASTERISKS = re.compile(r'\*+')
+
+# is_list_formatting (applied to stripped lines)
+# Bullet points: one char lookup instead of a regex per line
+_BULLET_CHARS = frozenset('-–—•●○◦◆◇▪▫★☆→►▸*')
+# Numbered (1. 1)), roman (i. ii.), lettered (a. a)) and parenthesized ((a)) markers
+_ENUMERATED_LIST_ITEM = re.compile(r'(?:\d+|[ivxIVX]+|[a-zA-Z])[.)]\s|\([a-zA-Z]\)\s')
+# Common markers at a line start, counted with str.count before the per-line scan
+_COMMON_LIST_MARKERS = ('\n- ', '\n* ', '\n• ') + tuple(f'\n{i}. ' for i in range(1, 10))
+
+# chunk_text_by_paragraphs
+_PARAGRAPH_SPLIT = re.compile(r'\n\n+')
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROMPT TEMPLATES (loaded from external config)
+# ═══════════════════════════════════════════════════════════════════════════════
 
 def load_prompts():
     """
@@ -90,32 +221,91 @@ def load_prompts():
             "No prompts config found. Copy prompts.example.json to prompts.json"
         )
 
-# Load prompts at module level (will be loaded when server starts)
+# Loaded once by init_prompts() (called from initialize()); each template is
+# bound to a module-level name so the accessors are plain global reads
 _prompts = None
+_MERGE = None
+_CORRECT = None
+_EXTRACT = None
+_POLISH_PROMPTS: dict = {}
+_POLISH_DEFAULT = None
+_DEEP = None
+
+def init_prompts():
+    """Load prompts and bind the per-type templates."""
+    global _prompts, _MERGE, _CORRECT, _EXTRACT, _POLISH_PROMPTS, _POLISH_DEFAULT, _DEEP
+    _prompts = load_prompts()
+    _MERGE = _prompts["MERGE_PROMPT"]
+    _CORRECT = _prompts["CORRECT_SENTENCE_PROMPT"]
+    _EXTRACT = _prompts["EXTRACT_NEW_WORDS_PROMPT"]
+    _POLISH_PROMPTS = _prompts["POLISH_PROMPTS"]
+    _POLISH_DEFAULT = _POLISH_PROMPTS["clean"]
+    _DEEP = _prompts["DEEP_CLEANUP_PROMPT"]
 
 def get_prompts():
     """Get loaded prompts, loading if necessary."""
-    global _prompts
     if _prompts is None:
-        _prompts = load_prompts()
+        init_prompts()
     return _prompts
 
-# Accessor functions for each prompt type
+# Accessor functions for each prompt type (valid after init_prompts())
 def get_merge_prompt():
-    return get_prompts()["MERGE_PROMPT"]
+    return _MERGE
 
 def get_correct_sentence_prompt():
-    return get_prompts()["CORRECT_SENTENCE_PROMPT"]
+    return _CORRECT
 
 def get_extract_new_words_prompt():
-    return get_prompts()["EXTRACT_NEW_WORDS_PROMPT"]
+    return _EXTRACT
 
 def get_polish_prompt(mode: str):
-    prompts = get_prompts()["POLISH_PROMPTS"]
-    return prompts.get(mode, prompts["clean"])
+    return _POLISH_PROMPTS.get(mode, _POLISH_DEFAULT)
 
 def get_deep_cleanup_prompt():
-    return get_prompts()["DEEP_CLEANUP_PROMPT"]
+    return _DEEP
+
+# Prompt builders - rolling Live Paste calls often resend identical context
+# (the same pasted tail while STT stabilizes), so memoize the formatted prompt.
+@functools.lru_cache(maxsize=64)
+def build_merge_prompt(pasted: str, new_text: str) -> str:
+    return get_merge_prompt().format(pasted=pasted, new_text=new_text)
+
+@functools.lru_cache(maxsize=64)
+def build_correct_sentence_prompt(original: str, latest: str) -> str:
+    return get_correct_sentence_prompt().format(original=original, latest=latest)
+
+@functools.lru_cache(maxsize=64)
+def build_extract_new_words_prompt(pasted_end: str, tail_words: str) -> str:
+    return get_extract_new_words_prompt().format(pasted_end=pasted_end, tail_words=tail_words)
+
+@functools.lru_cache(maxsize=16)
+def get_template_prefix(template: str) -> str:
+    """
+    Static head of a prompt template, used as the prompt-cache key.
+    
+    Everything before the first placeholder is identical across calls
+    (system prompt + few-shot examples). Cut at the last line boundary so
+    the prefix tokenizes the same way on its own as inside the full prompt.
+    """
+    placeholder = template.find('{')
+    head = template if placeholder == -1 else template[:placeholder]
+    return head[:head.rfind('\n') + 1]
+
+# (prompt, prompt_prefix) for the real-time ops - shared by handlers and batching
+def _merge_prompt(pasted: str, new_text: str) -> Tuple[str, str]:
+    # Limit context for speed
+    pasted_context = pasted[-200:] if len(pasted) > 200 else pasted
+    new_context = new_text[-200:] if len(new_text) > 200 else new_text
+    return build_merge_prompt(pasted_context, new_context), get_template_prefix(get_merge_prompt())
+
+def _correct_sentence_prompt(original: str, latest: str) -> Tuple[str, str]:
+    return build_correct_sentence_prompt(original, latest), get_template_prefix(get_correct_sentence_prompt())
+
+def _extract_new_words_prompt(pasted_end: str, tail_words: str) -> Tuple[str, str]:
+    # Limit context for speed
+    pasted_context = pasted_end[-100:] if len(pasted_end) > 100 else pasted_end
+    tail_context = tail_words[:200] if len(tail_words) > 200 else tail_words
+    return build_extract_new_words_prompt(pasted_context, tail_context), get_template_prefix(get_extract_new_words_prompt())
 
 # Legacy compatibility - these will be replaced with function calls
 MERGE_PROMPT = None  # Use get_merge_prompt() instead
@@ -140,12 +330,53 @@ _quality_model: Any = None
 _quality_tokenizer: Any = None
 _mlx_lm = None
 
+_model_state = MODEL_STATE_REALTIME
+_last_voice_activity = 0.0
+_swap_to_realtime_pending = False
+_deep_prewarm_pending = False
+# Whether the quality model may load next to the pinned deep model
+_pinned_quality_retry = False
+# Background read of the deep model's weight files (file I/O only, no MLX)
+_deep_prefetch_thread: Optional[threading.Thread] = None
+_deep_readahead_done = False
+
 
 def log(message: str) -> None:
     """Log to stderr (visible in Electron console)"""
     print(f"[LLM] {message}", file=sys.stderr, flush=True)
 
 
+def encode_message(payload: dict) -> bytes:
+    """Encode a message as one UTF-8 JSON line."""
+    if orjson is not None:
+        # Newline appended by orjson in the same buffer (no bytes concatenation)
+        return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(payload) + "\n").encode("utf-8")
+
+
+def decode_message(line: str) -> Any:
+    """
+    Decode one JSON command line.
+    
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch
+    the stdlib exception either way.
+    """
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def send_message(payload: dict) -> None:
+    """
+    Write one JSON message line to stdout (responses and model signals).
+    
+    Newline framing is kept: JSON never contains a raw newline, and
+    llmService.ts reads the stream with readline.
+    """
+    sys.stdout.buffer.write(encode_message(payload))
+    sys.stdout.buffer.flush()
+
+
 def import_mlx_lm():
     """Import mlx-lm module (lazy load)"""
     global _mlx_lm
@@ -172,7 +403,11 @@ def load_fast_model() -> Tuple[Any, Any]:
     log(f"Loading fast model: {FAST_MODEL}")
     start = time.time()
     
-    _fast_model, _fast_tokenizer = mlx_lm.load(FAST_MODEL)
+    try:
+        _fast_model, _fast_tokenizer = mlx_lm.load(FAST_MODEL)
+    except Exception as e:
+        log(f"Could not load {FAST_MODEL} ({e}), falling back to {FAST_MODEL_FALLBACK}")
+        _fast_model, _fast_tokenizer = mlx_lm.load(FAST_MODEL_FALLBACK)
     
     elapsed = int((time.time() - start) * 1000)
     log(f"Fast model loaded in {elapsed}ms")
@@ -180,6 +415,32 @@ def load_fast_model() -> Tuple[Any, Any]:
     return _fast_model, _fast_tokenizer
 
 
+def warmup_fast_model() -> int:
+    """
+    Run the fast model once and prefill the real-time prompt prefixes.
+    
+    The first forward pass on MLX compiles kernels, and the prefix caches are
+    otherwise built on the first merge/correct/extract - both would land on
+    the user-visible first paste. Returns elapsed ms.
+    """
+    model, tokenizer = load_fast_model()
+    start = time.time()
+    generate_text(
+        model,
+        tokenizer,
+        "<|im_start|>user\nhi<|im_end|>\n<|im_start|>assistant\n",
+        max_tokens=4,
+    )
+    try:
+        for template in (get_merge_prompt(), get_correct_sentence_prompt(), get_extract_new_words_prompt()):
+            get_prefix_cache(model, tokenizer, get_template_prefix(template))
+    except Exception as e:
+        log(f"Prompt prefix prefill failed (non-critical): {e}")
+    elapsed = int((time.time() - start) * 1000)
+    log(f"Fast model warmup complete in {elapsed}ms")
+    return elapsed
+
+
 def load_quality_model() -> Tuple[Any, Any]:
     """Load the quality model for final polish (lazy load)"""
     global _quality_model, _quality_tokenizer, _deep_model, _deep_tokenizer
@@ -187,8 +448,9 @@ def load_quality_model() -> Tuple[Any, Any]:
     if _quality_model is not None:
         return _quality_model, _quality_tokenizer
     
-    # If deep model is loaded, unload it first to free memory
-    if _deep_model is not None:
+    # If deep model is loaded, unload it first to free memory (unless it is
+    # pinned with room for both)
+    if _deep_model is not None and not (_model_state == MODEL_STATE_PINNED and _pinned_quality_retry):
         log("[Memory] Unloading deep model before loading quality model")
         unload_deep_model()
     
@@ -210,10 +472,10 @@ def load_quality_model() -> Tuple[Any, Any]:
     log(f"Quality model loaded in {elapsed}ms")
     
     # Signal quality model loaded (for metrics)
-    print(json.dumps({
+    send_message({
         "type": "quality_model_loaded",
         "load_time_ms": elapsed
-    }), flush=True)
+    })
     
     return _quality_model, _quality_tokenizer
 
@@ -224,37 +486,73 @@ _deep_tokenizer = None
 _deep_model_disabled = False  # Set to True if loading fails due to memory
 
 
-def get_available_memory_gb() -> float:
-    """Get available system memory in GB."""
+def _vm_stat_available_bytes() -> int:
+    """Free + inactive bytes parsed from vm_stat (fallback when psutil is missing)."""
     import subprocess
+    # Get memory pressure info on macOS
+    result = subprocess.run(['vm_stat'], capture_output=True, text=True)
+    lines = result.stdout.strip().split('\n')
+    
+    page_size = 4096  # Default page size on macOS
+    free_pages = 0
+    inactive_pages = 0
+    
+    for line in lines:
+        if 'page size of' in line:
+            parts = line.split()
+            for i, p in enumerate(parts):
+                if p.isdigit():
+                    page_size = int(p)
+                    break
+        elif 'Pages free:' in line:
+            free_pages = int(line.split(':')[1].strip().replace('.', ''))
+        elif 'Pages inactive:' in line:
+            inactive_pages = int(line.split(':')[1].strip().replace('.', ''))
+    
+    return (free_pages + inactive_pages) * page_size
+
+
+# (timestamp, available_gb) - memory checks come in bursts around silence events
+_available_memory_cache: Tuple[float, float] = (0.0, 0.0)
+
+
+def get_available_memory_gb() -> float:
+    """Get available system memory in GB (cached for MEMORY_CHECK_TTL_S)."""
+    global _available_memory_cache
+    checked_at, available_gb = _available_memory_cache
+    if time.time() - checked_at < MEMORY_CHECK_TTL_S:
+        return available_gb
     try:
-        # Get memory pressure info on macOS
-        result = subprocess.run(['vm_stat'], capture_output=True, text=True)
-        lines = result.stdout.strip().split('\n')
-        
-        page_size = 4096  # Default page size on macOS
-        free_pages = 0
-        inactive_pages = 0
-        
-        for line in lines:
-            if 'page size of' in line:
-                parts = line.split()
-                for i, p in enumerate(parts):
-                    if p.isdigit():
-                        page_size = int(p)
-                        break
-            elif 'Pages free:' in line:
-                free_pages = int(line.split(':')[1].strip().replace('.', ''))
-            elif 'Pages inactive:' in line:
-                inactive_pages = int(line.split(':')[1].strip().replace('.', ''))
-        
-        available_bytes = (free_pages + inactive_pages) * page_size
-        return available_bytes / (1024**3)
+        if psutil is not None:
+            available_bytes = psutil.virtual_memory().available
+        else:
+            available_bytes = _vm_stat_available_bytes()
+        available_gb = available_bytes / (1024**3)
+        _available_memory_cache = (time.time(), available_gb)
+        return available_gb
     except Exception as e:
         log(f"[Memory] Could not get available memory: {e}")
         return 4.0  # Conservative default
 
 
+def invalidate_memory_cache() -> None:
+    """Forget the cached reading after freeing model memory."""
+    global _available_memory_cache
+    _available_memory_cache = (0.0, 0.0)
+
+
+@functools.lru_cache(maxsize=1)
+def get_total_memory_gb() -> float:
+    """Get total system memory in GB (fixed for the process lifetime)."""
+    if psutil is not None:
+        total_bytes = psutil.virtual_memory().total
+    else:
+        import subprocess
+        result = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True)
+        total_bytes = int(result.stdout.strip())
+    return total_bytes / (1024**3)
+
+
 def check_gpu_memory_available(required_gb: float = 3.0) -> bool:
     """
     Check if there's enough GPU memory available.
@@ -265,12 +563,9 @@ def check_gpu_memory_available(required_gb: float = 3.0) -> bool:
     - 4B model needs ~3-4GB additional
     - Most Macs have 8-64GB unified memory
     """
-    import subprocess
     try:
         # Get total system memory
-        result = subprocess.run(['sysctl', '-n', 'hw.memsize'], capture_output=True, text=True)
-        total_bytes = int(result.stdout.strip())
-        total_gb = total_bytes / (1024**3)
+        total_gb = get_total_memory_gb()
         
         # Check available memory (more accurate than total)
         available_gb = get_available_memory_gb()
@@ -294,16 +589,16 @@ def check_gpu_memory_available(required_gb: float = 3.0) -> bool:
 def unload_quality_model() -> None:
     """Unload quality model to free GPU memory for deep model."""
     global _quality_model, _quality_tokenizer
-    import gc
     
     if _quality_model is not None:
         log("[Memory] Unloading quality model to make room for deep model")
+        drop_prefix_caches(_quality_model)
         _quality_model = None
         _quality_tokenizer = None
         gc.collect()
+        invalidate_memory_cache()
         # Force MLX to release memory
         try:
-            import mlx.core as mx
             mx.metal.clear_cache()
             log("[Memory] Cleared MLX metal cache")
         except Exception as e:
@@ -312,16 +607,17 @@ def unload_quality_model() -> None:
 
 def unload_deep_model() -> None:
     """Unload deep model to free GPU memory for real-time processing."""
-    global _deep_model, _deep_tokenizer
-    import gc
+    global _deep_model, _deep_tokenizer, _model_state
     
     if _deep_model is not None:
         log("[Memory] Unloading deep model to prioritize real-time")
+        drop_prefix_caches(_deep_model)
         _deep_model = None
         _deep_tokenizer = None
+        _model_state = MODEL_STATE_REALTIME
         gc.collect()
+        invalidate_memory_cache()
         try:
-            import mlx.core as mx
             mx.metal.clear_cache()
             log("[Memory] Cleared MLX metal cache")
         except Exception as e:
@@ -347,7 +643,7 @@ def load_deep_model(swap_out_quality: bool = True) -> Tuple[Optional[Any], Optio
     - Deep (4B): ~2.5GB - Loaded during silence for cleanup
     - Total with swap: Fast + Deep = ~2.9GB (safe for 8GB+ Macs)
     """
-    global _deep_model, _deep_tokenizer, _deep_model_disabled
+    global _deep_model, _deep_tokenizer, _deep_model_disabled, _model_state
     
     # If previously disabled due to memory, don't retry
     if _deep_model_disabled:
@@ -361,14 +657,14 @@ def load_deep_model(swap_out_quality: bool = True) -> Tuple[Optional[Any], Optio
         unload_quality_model()
     
     # Force garbage collection and clear MLX cache to maximize available memory
-    import gc
     gc.collect()
     try:
-        import mlx.core as mx
         mx.metal.clear_cache()
     except Exception:
         pass
     
+    invalidate_memory_cache()
+    
     # Check if we have enough memory (after unloading and clearing cache)
     # Threshold lowered to 2.0GB - model may use swap but should work on 8GB+ Macs
     if not check_gpu_memory_available(required_gb=2.0):
@@ -403,11 +699,13 @@ def load_deep_model(swap_out_quality: bool = True) -> Tuple[Optional[Any], Optio
         except Exception as e:
             log(f"Deep model warmup failed (non-critical): {e}")
         
+        _model_state = MODEL_STATE_DEEP
+        
         # Signal deep model loaded (for metrics)
-        print(json.dumps({
+        send_message({
             "type": "deep_model_loaded",
             "load_time_ms": elapsed
-        }), flush=True)
+        })
         
         return _deep_model, _deep_tokenizer
         
@@ -432,6 +730,210 @@ def swap_to_realtime_mode() -> None:
         log("[Memory] Swapped to real-time mode")
 
 
+def note_voice_activity() -> None:
+    """Record a real-time request; schedule a swap back if the deep model is in."""
+    global _last_voice_activity, _swap_to_realtime_pending
+    _last_voice_activity = time.time()
+    if _model_state not in (MODEL_STATE_REALTIME, MODEL_STATE_PINNED):
+        _swap_to_realtime_pending = True
+
+
+def quality_retry_allowed() -> bool:
+    """Real-time ops may load the quality model in real-time mode, or once
+    speech has resumed and the deep model is due to be swapped out anyway.
+    
+    Loading it would otherwise evict the deep model (mid-transition, or pinned
+    by the startup prewarm without room for both), so they stick with the
+    fast model's answer.
+    """
+    if _model_state == MODEL_STATE_PINNED:
+        return _pinned_quality_retry
+    return _model_state == MODEL_STATE_REALTIME or _swap_to_realtime_pending
+
+
+def prefetch_deep_model_files() -> None:
+    """
+    Read the deep model's cached weight files into the OS page cache.
+    
+    Runs on a background thread and touches no MLX state, so the deep
+    model's next load on the main loop (Phase 4, deep cleanup or the startup
+    prewarm) reads from memory instead of disk. Best effort: nothing happens
+    if the model isn't in the HF cache yet.
+    """
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return
+    try:
+        config_path = try_to_load_from_cache(DEEP_MODEL, "config.json")
+        if not isinstance(config_path, str):
+            return
+        start = time.time()
+        buffer = bytearray(DEEP_PREFETCH_READ_BYTES)
+        for path in glob.glob(os.path.join(os.path.dirname(config_path), "*.safetensors")):
+            with open(path, "rb", buffering=0) as f:
+                while f.readinto(buffer):
+                    pass
+        log(f"[Memory] Deep model weights read ahead in {int((time.time() - start) * 1000)}ms")
+    except Exception as e:
+        log(f"[Memory] Deep model read-ahead failed (non-critical): {e}")
+
+
+def preload_deep_model(reason: str, pin: bool = False) -> None:
+    """Load the deep model ahead of Silence Polish / deep cleanup.
+    
+    Leaves the quality model loaded (load_deep_model still checks memory).
+    With pin=True it stays loaded through voice activity (startup prewarm).
+    """
+    global _model_state, _pinned_quality_retry
+    if _deep_model is not None or _deep_model_disabled:
+        return
+    _model_state = MODEL_STATE_TRANSITIONING
+    log(f"[Memory] {reason} - preloading deep model")
+    model, _ = load_deep_model(swap_out_quality=False)
+    if model is None:
+        _model_state = MODEL_STATE_REALTIME
+    elif pin:
+        _model_state = MODEL_STATE_PINNED
+        _pinned_quality_retry = (
+            _quality_model is not None
+            or check_gpu_memory_available(required_gb=QUALITY_MODEL_REQUIRED_GB)
+        )
+        if _pinned_quality_retry:
+            log("[Memory] Deep model pinned; quality-model retries stay enabled")
+        else:
+            log("[Memory] Deep model pinned without room for the quality model - "
+                "merge/extract quality retries are disabled while it stays loaded")
+
+
+def run_idle_model_swaps() -> None:
+    """
+    Drive model swaps from the main loop while no command is pending.
+    
+    - Speech resumed while the deep model is in -> swap to real-time mode
+    - First silence after speech -> read the deep model's weights into the
+      page cache on a background thread (no load)
+    - Pending startup prewarm -> the same read, then load it here once the
+      read has finished
+    """
+    global _swap_to_realtime_pending, _deep_prefetch_thread, _deep_prewarm_pending, _deep_readahead_done
+    if _swap_to_realtime_pending:
+        _swap_to_realtime_pending = False
+        swap_to_realtime_mode()
+        return
+    
+    if _deep_model is not None or _deep_model_disabled:
+        _deep_prewarm_pending = False
+        return
+    
+    if _deep_prefetch_thread is not None:
+        if _deep_prefetch_thread.is_alive():
+            return
+        _deep_prefetch_thread = None
+        if _deep_prewarm_pending:
+            _deep_prewarm_pending = False
+            preload_deep_model("Startup prewarm", pin=True)
+        return
+    
+    silent_for = time.time() - _last_voice_activity
+    if _deep_prewarm_pending or (not _deep_readahead_done
+                                 and _last_voice_activity > 0
+                                 and silent_for >= DEEP_READAHEAD_SILENCE_S):
+        _deep_readahead_done = True
+        _deep_prefetch_thread = threading.Thread(
+            target=prefetch_deep_model_files, name="deep-prefetch", daemon=True
+        )
+        _deep_prefetch_thread.start()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PROMPT PREFIX CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Prefilled KV caches for static template heads: (id(model), prefix) -> (prefix_ids, cache)
+# Only the dynamic tail of each prompt has to be prefilled per request.
+_prefix_caches: dict = {}
+# Whether prefix_ids + tokenized suffix matches full-prompt tokenization: (id(model), prefix) -> bool
+_prefix_split_verified: dict = {}
+
+
+def get_prefix_cache(model: Any, tokenizer: Any, prefix: str) -> Tuple[list, Optional[Any]]:
+    """
+    Get (or build) the prefilled prompt cache for a static prompt prefix.
+    
+    Returns (prefix_ids, cache). cache is None if this model's cache type
+    can't be trimmed back to the prefix after use (no reuse possible).
+    """
+    key = (id(model), prefix)
+    entry = _prefix_caches.get(key)
+    if entry is not None:
+        return entry
+    
+    from mlx_lm.models.cache import make_prompt_cache, can_trim_prompt_cache
+    
+    prefix_ids = tokenizer.encode(prefix)
+    cache = make_prompt_cache(model)
+    if not prefix_ids or not can_trim_prompt_cache(cache):
+        entry = (prefix_ids, None)
+    else:
+        start = time.time()
+        model(mx.array(prefix_ids)[None], cache=cache)
+        mx.eval([c.state for c in cache])
+        log(f"[PromptCache] Prefilled {len(prefix_ids)} prefix tokens in {int((time.time() - start) * 1000)}ms")
+        entry = (prefix_ids, cache)
+    
+    _prefix_caches[key] = entry
+    return entry
+
+
+def tokenize_prompt_suffix(model: Any, tokenizer: Any, prompt: str, prefix: str, prefix_ids: list) -> Optional[list]:
+    """
+    Tokenize only the dynamic part of a prompt that follows its cached prefix.
+    
+    The first prompt seen for each prefix is also tokenized in full to check
+    that prefix_ids + suffix_ids reproduces it; returns None if it doesn't.
+    """
+    suffix_ids = tokenizer.encode(prompt[len(prefix):], add_special_tokens=False)
+    key = (id(model), prefix)
+    split_ok = _prefix_split_verified.get(key)
+    if split_ok is None:
+        split_ok = tokenizer.encode(prompt) == prefix_ids + suffix_ids
+        _prefix_split_verified[key] = split_ok
+        if not split_ok:
+            log("[PromptCache] Prefix does not tokenize separately - not reusing its cache")
+    return suffix_ids if split_ok and suffix_ids else None
+
+
+def prefix_cached_rows(model: Any, tokenizer: Any, prompts: list, prefix: str) -> Optional[Tuple[list, list]]:
+    """
+    Per-row inputs for a batch whose prompts all start with prefix.
+    
+    Returns (suffix_ids per prompt, prompt cache per prompt), each cache a
+    private copy of the prefilled prefix cache (rows write their own tokens
+    into it), or None when the prefix cache can't be used.
+    """
+    if not prefix or not all(prompt.startswith(prefix) for prompt in prompts):
+        return None
+    prefix_ids, base_cache = get_prefix_cache(model, tokenizer, prefix)
+    if base_cache is None:
+        return None
+    suffixes = [tokenize_prompt_suffix(model, tokenizer, prompt, prefix, prefix_ids) for prompt in prompts]
+    if any(suffix is None for suffix in suffixes):
+        return None
+    return suffixes, [copy.deepcopy(base_cache) for _ in prompts]
+
+
+def drop_prefix_caches(model: Any = None) -> None:
+    """Drop prefilled prefix caches for a model (or all models) before unloading."""
+    if model is None:
+        _prefix_caches.clear()
+        _prefix_split_verified.clear()
+        return
+    for cache_dict in (_prefix_caches, _prefix_split_verified):
+        for key in [k for k in cache_dict if k[0] == id(model)]:
+            del cache_dict[key]
+
+
 def is_fast_model_busy() -> bool:
     """Check if fast model was recently used (GPU may be busy)."""
     global _last_fast_model_use
@@ -439,7 +941,108 @@ def is_fast_model_busy() -> bool:
     return (time.time() - _last_fast_model_use) < 0.1
 
 
-def generate_text(model: Any, tokenizer: Any, prompt: str, max_tokens: int = 150, fallback: str = "") -> str:
+def _answer_part(response: str) -> Optional[str]:
+    """Text after the think block, or None while a think block is still open."""
+    if "<think>" not in response:
+        return response
+    think_end = response.find("</think>")
+    return None if think_end == -1 else response[think_end + 8:]
+
+
+def _run_generation(
+    model: Any,
+    tokenizer: Any,
+    prompt: str,
+    max_tokens: int,
+    prompt_prefix: str,
+    answer_stops: tuple = (),
+    draft_model: Any = None,
+    kv_bits: Optional[int] = None,
+) -> str:
+    """Run a single greedy generation, reusing the prefix KV cache when possible.
+    
+    Stops early once the output contains one of STOP_SEQUENCES, or once the
+    answer (after any think block) contains one of answer_stops. With a
+    draft_model, decoding is speculative; the draft's own prefix cache is
+    used alongside the target's.
+    """
+    mlx_lm = import_mlx_lm()
+    
+    # Create deterministic sampler (temp=0 means argmax)
+    sampler = mlx_lm.sample_utils.make_sampler(temp=0.0)
+    
+    prompt_input: Any = prompt
+    prompt_cache = None
+    prefix_len = 0
+    if prompt_prefix and prompt.startswith(prompt_prefix):
+        prefix_ids, prompt_cache = get_prefix_cache(model, tokenizer, prompt_prefix)
+        if prompt_cache is not None:
+            suffix_ids = tokenize_prompt_suffix(model, tokenizer, prompt, prompt_prefix, prefix_ids)
+            if suffix_ids is not None:
+                prompt_input = suffix_ids
+                prefix_len = len(prefix_ids)
+            else:
+                prompt_cache = None
+    
+    draft_cache = None
+    generate_kwargs = {}
+    if draft_model is not None:
+        generate_kwargs = {"draft_model": draft_model, "num_draft_tokens": SPECULATIVE_DRAFT_TOKENS}
+        if prompt_cache is not None:
+            draft_ids, draft_cache = get_prefix_cache(draft_model, tokenizer, prompt_prefix)
+            if draft_cache is None or draft_ids != prefix_ids:
+                # Can't line the draft up with the cached prefix - decode without it
+                draft_cache = None
+                generate_kwargs = {}
+    elif kv_bits is not None:
+        # Converts the cache (prefix included) to QuantizedKVCache in place
+        generate_kwargs = {"kv_bits": kv_bits}
+    
+    try:
+        # Stream so decoding stops at the end of the assistant turn instead of
+        # running on to max_tokens when the EOS id doesn't cover it
+        response = ""
+        for chunk in mlx_lm.stream_generate(
+            model,
+            tokenizer,
+            prompt=prompt_input,
+            max_tokens=max_tokens,
+            sampler=sampler,
+            # Speculative decoding takes the target's cache layers then the draft's
+            prompt_cache=prompt_cache + draft_cache if draft_cache is not None else prompt_cache,
+            **generate_kwargs,
+        ):
+            response += chunk.text
+            tail = response[-(len(chunk.text) + STOP_LOOKBACK_CHARS):]
+            if any(stop in tail for stop in STOP_SEQUENCES):
+                break
+            if answer_stops:
+                answer = _answer_part(response)
+                if answer is not None:
+                    answer = answer.lstrip()
+                    if answer and any(stop in answer for stop in answer_stops):
+                        break
+        return response
+    finally:
+        if prompt_cache is not None:
+            # Roll the cache(s) back to the static prefix for the next call
+            from mlx_lm.models.cache import trim_prompt_cache
+            trim_prompt_cache(prompt_cache, prompt_cache[0].offset - prefix_len)
+            if draft_cache is not None:
+                trim_prompt_cache(draft_cache, draft_cache[0].offset - prefix_len)
+
+
+def generate_text(
+    model: Any,
+    tokenizer: Any,
+    prompt: str,
+    max_tokens: int = 150,
+    fallback: str = "",
+    prompt_prefix: str = "",
+    answer_stops: tuple = (),
+    draft_model: Any = None,
+    kv_bits: Optional[int] = None,
+) -> str:
     """Generate text using the model
     
     Args:
@@ -448,27 +1051,41 @@ def generate_text(model: Any, tokenizer: Any, prompt: str, max_tokens: int = 150
         prompt: The prompt to send to the model
         max_tokens: Maximum tokens to generate
         fallback: Text to return if generation fails
+        prompt_prefix: Static head of the prompt (see get_template_prefix).
+            Its KV cache is prefilled once and reused across calls.
+        answer_stops: Strings that end the answer (e.g. "\n" for single-line
+            answers). Decoding stops there and the rest is dropped.
+        draft_model: Smaller model sharing the tokenizer, for speculative
+            decoding (output is identical under greedy sampling).
+        kv_bits: Quantize the KV cache to this many bits (not combined
+            with draft_model).
     
     Returns:
         The generated text, or fallback if generation fails
     """
-    mlx_lm = import_mlx_lm()
+    global _generation_failures
+    key = (id(model), prompt, max_tokens)
+    if key in _prefetched_generations:
+        # Already generated as part of a batch (see prefetch_fast_batch)
+        response = _prefetched_generations.pop(key)
+    else:
+        try:
+            response = _run_generation(model, tokenizer, prompt, max_tokens, prompt_prefix, answer_stops, draft_model, kv_bits)
+        except Exception as e:
+            _generation_failures += 1
+            log(f"Generation error: {e}")
+            return fallback
     
-    try:
-        # Create deterministic sampler (temp=0 means argmax)
-        sampler = mlx_lm.sample_utils.make_sampler(temp=0.0)
-        
-        response = mlx_lm.generate(
-            model,
-            tokenizer,
-            prompt=prompt,
-            max_tokens=max_tokens,
-            verbose=False,
-            sampler=sampler,
-        )
-    except Exception as e:
-        log(f"Generation error: {e}")
-        return fallback
+    return clean_generation(response, fallback, answer_stops)
+
+
+def clean_generation(response: str, fallback: str = "", answer_stops: tuple = ()) -> str:
+    """Reduce raw model output to the final answer (or fallback if there is none)."""
+    # Drop anything past the end of the assistant turn
+    for stop in STOP_SEQUENCES:
+        stop_at = response.find(stop)
+        if stop_at != -1:
+            response = response[:stop_at]
     
     # Strip the response
     response = response.strip()
@@ -490,6 +1107,12 @@ def generate_text(model: Any, tokenizer: Any, prompt: str, max_tokens: int = 150
     # Also strip any remaining special tokens
     response = response.replace("<|im_end|>", "").strip()
     
+    # Keep only the answer up to its first stop (e.g. single-line answers)
+    for stop in answer_stops:
+        stop_at = response.find(stop)
+        if stop_at != -1:
+            response = response[:stop_at].strip()
+    
     # If response is empty after processing, use fallback
     if not response:
         return fallback
@@ -497,16 +1120,206 @@ def generate_text(model: Any, tokenizer: Any, prompt: str, max_tokens: int = 150
     return response
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# REQUEST BATCHING
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# Raw fast-model outputs generated ahead of dispatch: (id(model), prompt, max_tokens) -> text
+_prefetched_generations: dict = {}
+
+
+def plan_fast_generation(command: dict) -> Optional[Tuple[str, int]]:
+    """
+    Return (prompt, max_tokens) if this command will run the fast model.
+    
+    Mirrors the handlers: commands answered by the quick heuristic or the
+    response cache return None.
+    """
+    action = command.get("action", "")
+    
+    if action == "merge_text":
+        pasted = command.get("pasted", "")
+        new_text = command.get("new_text", "")
+        if _quick_diff_check(pasted, new_text)[0]:
+            return None
+        if get_cached_response(("merge_text", pasted, new_text)) is not None:
+            return None
+        return _merge_prompt(pasted, new_text)[0], 100
+    
+    if action == "correct_sentence":
+        original = command.get("original", "")
+        latest = command.get("latest", "")
+        if original == latest or _normalize_for_comparison(original) == _normalize_for_comparison(latest):
+            return None
+        if get_cached_response(("correct_sentence", original, latest)) is not None:
+            return None
+        return _correct_sentence_prompt(original, latest)[0], 150
+    
+    if action == "extract_new_words":
+        pasted_end = command.get("pasted_end", "")
+        tail_words = command.get("tail_words", "")
+        if get_cached_response(("extract_new_words", pasted_end, tail_words)) is not None:
+            return None
+        return _extract_new_words_prompt(pasted_end, tail_words)[0], 100
+    
+    return None
+
+
+def encode_batch(tokenizer: Any, prompts: list) -> list:
+    """
+    Token ids for several prompts from one call into the underlying fast
+    tokenizer, instead of one encode() round trip per prompt.
+    
+    No padding here: batch_generate left-pads the rows itself.
+    """
+    hf_tokenizer = getattr(tokenizer, "_tokenizer", tokenizer)
+    try:
+        return hf_tokenizer(list(prompts))["input_ids"]
+    except Exception:
+        return [tokenizer.encode(prompt) for prompt in prompts]
+
+
+def prefetch_fast_batch(commands: list) -> None:
+    """
+    Generate the fast-model prompts of several pending commands in one batch.
+    
+    Decode on the 0.6B model is bound by weight loads, so a batch of 2-4
+    costs about the same wall time as a single request. Results land in
+    _prefetched_generations and are picked up by generate_text when the
+    handlers run in order. Any failure just leaves the handlers to generate
+    one by one.
+    """
+    mlx_lm = import_mlx_lm()
+    batch_generate = getattr(mlx_lm, "batch_generate", None)
+    if batch_generate is None:
+        return
+    
+    plans = []
+    for command in commands:
+        plan = plan_fast_generation(command)
+        if plan is not None and plan not in plans:
+            plans.append(plan)
+    if len(plans) < 2:
+        return
+    
+    try:
+        model, tokenizer = load_fast_model()
+        start = time.time()
+        response = batch_generate(
+            model,
+            tokenizer,
+            encode_batch(tokenizer, [prompt for prompt, _ in plans]),
+            max_tokens=[max_tokens for _, max_tokens in plans],
+            verbose=False,
+        )
+        for (prompt, max_tokens), text in zip(plans, response.texts):
+            _prefetched_generations[(id(model), prompt, max_tokens)] = text
+        log(f"[Batch] Generated {len(plans)} requests in {int((time.time() - start) * 1000)}ms")
+    except Exception as e:
+        log(f"[Batch] Batched generation failed, running serially: {e}")
+
+
+def generate_batch(
+    model: Any,
+    tokenizer: Any,
+    prompts: list,
+    max_tokens_list: list,
+    fallbacks: list,
+    prompt_prefix: str = "",
+) -> list:
+    """
+    Generate several independent prompts with one batched decode.
+    
+    All rows advance together each decoding step, so weight loads are shared
+    instead of paid once per prompt. Each row stops at EOS or its own token
+    budget in max_tokens_list. Each row starts from a copy of the prefilled
+    prompt_prefix cache, so only the chunk text is prefilled per row. Falls
+    back to one generate_text call per prompt (which still reuses the prefix
+    KV cache) when mlx_lm has no batch_generate or the batch fails.
+    
+    Returns one cleaned result per prompt, in order.
+    """
+    mlx_lm = import_mlx_lm()
+    batch_generate = getattr(mlx_lm, "batch_generate", None)
+    
+    if batch_generate is not None and len(prompts) > 1:
+        try:
+            start = time.time()
+            response = None
+            rows = prefix_cached_rows(model, tokenizer, prompts, prompt_prefix)
+            if rows is not None:
+                suffixes, caches = rows
+                try:
+                    response = batch_generate(
+                        model,
+                        tokenizer,
+                        suffixes,
+                        prompt_caches=caches,
+                        max_tokens=list(max_tokens_list),
+                        verbose=False,
+                    )
+                except TypeError:
+                    pass  # mlx_lm without per-row prompt_caches - prefill full prompts
+            if response is None:
+                response = batch_generate(
+                    model,
+                    tokenizer,
+                    encode_batch(tokenizer, prompts),
+                    max_tokens=list(max_tokens_list),
+                    verbose=False,
+                )
+            log(f"[Batch] Generated {len(prompts)} prompts in {int((time.time() - start) * 1000)}ms")
+            return [clean_generation(text, fallback) for text, fallback in zip(response.texts, fallbacks)]
+        except Exception as e:
+            log(f"[Batch] Batched generation failed, running serially: {e}")
+    
+    return [
+        generate_text(model, tokenizer, prompt, max_tokens=max_tokens, fallback=fallback, prompt_prefix=prompt_prefix)
+        for prompt, max_tokens, fallback in zip(prompts, max_tokens_list, fallbacks)
+    ]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# RESPONSE CACHE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+# (action, *inputs) -> (timestamp, result fields). LRU order, oldest first.
+_response_cache: OrderedDict = OrderedDict()
+# Bumped each time generate_text falls back after an error; handlers don't
+# cache a result if it moved while they were generating
+_generation_failures = 0
+
+
+def get_cached_response(key: tuple) -> Optional[dict]:
+    """Return cached result fields for an exact input match, or None."""
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, fields = entry
+    if time.time() - stored_at > RESPONSE_CACHE_TTL_S:
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return fields
+
+
+def cache_response(key: tuple, fields: dict) -> None:
+    """Store post-processed result fields (without timing) for an input key."""
+    _response_cache[key] = (time.time(), fields)
+    _response_cache.move_to_end(key)
+    while len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # PHASE HANDLERS
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def _normalize_for_comparison(text: str) -> str:
     """Normalize text for semantic comparison (punctuation/whitespace insensitive)."""
-    import re
     result = text.lower()
-    result = re.sub(r'[.,!?;:\'"]+', '', result)  # Remove punctuation
-    result = re.sub(r'\s+', ' ', result).strip()
+    result = result.translate(_PUNCT_TABLE)  # Remove punctuation
+    result = _WHITESPACE_RUN.sub(' ', result).strip()
     return result
 
 
@@ -526,10 +1339,7 @@ def _quick_diff_check(pasted: str, new_text: str) -> tuple:
     # Case 2: New text is just pasted + suffix (simple append)
     if norm_new.startswith(norm_pasted):
         # Find where the new content starts in original
-        suffix_start = len(pasted)
-        while suffix_start < len(new_text) and new_text[suffix_start] in ' .,!?;:\'"':
-            suffix_start += 1
-        suffix = new_text[suffix_start:].strip()
+        suffix = new_text[len(pasted):].lstrip(_SUFFIX_LEAD_CHARS).strip()
         if suffix:
             return (True, suffix)
     
@@ -556,18 +1366,9 @@ def _looks_suspicious(result: str, pasted: str, new_text: str) -> bool:
     if len(result_clean) > max_expected_len:
         return True
     
-    # 2. Contains explanatory text
-    lower = result_clean.lower()
-    explanatory_markers = ['answer:', 'output:', 'the new words', 'result:', 'here is', 'here are']
-    if any(marker in lower for marker in explanatory_markers):
-        return True
-    
-    # 3. Contains markdown formatting
-    if '**' in result_clean or '```' in result_clean or '##' in result_clean:
-        return True
-    
-    # 4. Contains prompt artifacts (echoed labels)
-    if 'PASTED:' in result_clean.upper() or 'NEW:' in result_clean.upper():
+    # 2-4. Contains explanatory text, markdown formatting, or prompt artifacts
+    # (echoed labels) - one case-insensitive scan instead of several passes
+    if _SUSPICIOUS.search(result_clean):
         return True
     
     # 5. Result contains most of the pasted text (model echoed input)
@@ -582,11 +1383,10 @@ def _clean_merge_result(result: str) -> str:
     if not result:
         return ""
     
-    import re
     cleaned = result.strip()
     
     # Remove markdown
-    cleaned = re.sub(r'\*+', '', cleaned)
+    cleaned = _ASTERISKS.sub('', cleaned)
     
     # Remove explanatory prefixes
     for prefix in ['answer:', 'output:', 'new words:', 'result:']:
@@ -639,28 +1439,43 @@ def handle_merge_text(pasted: str, new_text: str) -> dict:
                 "used_heuristic": True,
             }
         
-        # Limit context for speed
-        pasted_context = pasted[-200:] if len(pasted) > 200 else pasted
-        new_context = new_text[-200:] if len(new_text) > 200 else new_text
-        prompt = get_merge_prompt().format(pasted=pasted_context, new_text=new_context)
+        cache_key = ("merge_text", pasted, new_text)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            elapsed = int((time.time() - start) * 1000)
+            log(f"[Phase 2] Cache hit: new_words='{cached['new_words']}', time={elapsed}ms")
+            return {
+                "type": "merge_result",
+                **cached,
+                "inference_time_ms": elapsed,
+                "exceeded_latency": False,
+                "cached": True,
+            }
+        
+        prompt, prompt_prefix = _merge_prompt(pasted, new_text)
         
         # Try fast model first
+        failures_before = _generation_failures
         model, tokenizer = load_fast_model()
         inference_start = time.time()
-        result = generate_text(model, tokenizer, prompt, max_tokens=100)
+        result = generate_text(model, tokenizer, prompt, max_tokens=100, prompt_prefix=prompt_prefix, answer_stops=SINGLE_LINE_STOPS)
         fast_time = int((time.time() - inference_start) * 1000)
         
         new_words = _clean_merge_result(result)
         used_quality = False
         
         # Check if result looks suspicious
-        if _looks_suspicious(result, pasted, new_text):
+        suspicious = _looks_suspicious(result, pasted, new_text)
+        if suspicious and quality_retry_allowed():
             log(f"[Phase 2] Fast model result suspicious ('{result[:50]}...'), retrying with quality model")
             
             # Retry with quality model
             model, tokenizer = load_quality_model()
             inference_start = time.time()
-            result = generate_text(model, tokenizer, prompt, max_tokens=100)
+            result = generate_text(
+                model, tokenizer, prompt, max_tokens=100, prompt_prefix=prompt_prefix,
+                answer_stops=SINGLE_LINE_STOPS, draft_model=_fast_model,
+            )
             quality_time = int((time.time() - inference_start) * 1000)
             
             new_words = _clean_merge_result(result)
@@ -671,6 +1486,9 @@ def handle_merge_text(pasted: str, new_text: str) -> dict:
         exceeded = elapsed > LATENCY_THRESHOLD_MERGE
         
         log(f"[Phase 2] Merge complete: new_words_len={len(new_words)}, total={elapsed}ms, exceeded={exceeded}, used_quality={used_quality}")
+        # Don't pin a fallback, or a suspicious answer whose retry was skipped
+        if _generation_failures == failures_before and (used_quality or not suspicious):
+            cache_response(cache_key, {"new_words": new_words, "used_quality_model": used_quality})
         
         return {
             "type": "merge_result",
@@ -706,12 +1524,39 @@ def handle_correct_sentence(original: str, latest: str) -> dict:
     
     try:
         log(f"[Phase 3] Correct request: original_len={len(original)}, latest_len={len(latest)}")
+        
+        # STT didn't revise the sentence - nothing for the model to reconcile
+        if original == latest or _normalize_for_comparison(original) == _normalize_for_comparison(latest):
+            elapsed = int((time.time() - start) * 1000)
+            log(f"[Phase 3] Unchanged input, skipping model: time={elapsed}ms")
+            return {
+                "type": "correct_result",
+                "corrected": original,
+                "changed": False,
+                "inference_time_ms": elapsed,
+                "exceeded_latency": False,
+            }
+        
+        cache_key = ("correct_sentence", original, latest)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            elapsed = int((time.time() - start) * 1000)
+            log(f"[Phase 3] Cache hit: changed={cached['changed']}, time={elapsed}ms")
+            return {
+                "type": "correct_result",
+                **cached,
+                "inference_time_ms": elapsed,
+                "exceeded_latency": False,
+                "cached": True,
+            }
+        
+        failures_before = _generation_failures
         model, tokenizer = load_fast_model()
         
-        prompt = get_correct_sentence_prompt().format(original=original, latest=latest)
+        prompt, prompt_prefix = _correct_sentence_prompt(original, latest)
         
         inference_start = time.time()
-        result = generate_text(model, tokenizer, prompt, max_tokens=150)
+        result = generate_text(model, tokenizer, prompt, max_tokens=150, prompt_prefix=prompt_prefix, answer_stops=PARAGRAPH_STOPS)
         inference_time = int((time.time() - inference_start) * 1000)
         
         # Check if anything changed
@@ -722,6 +1567,8 @@ def handle_correct_sentence(original: str, latest: str) -> dict:
         exceeded = elapsed > LATENCY_THRESHOLD_CORRECT
         
         log(f"[Phase 3] Correct complete: changed={changed}, inference={inference_time}ms, total={elapsed}ms, exceeded={exceeded}")
+        if _generation_failures == failures_before:
+            cache_response(cache_key, {"corrected": corrected, "changed": changed})
         
         return {
             "type": "correct_result",
@@ -750,26 +1597,24 @@ def normalize_output(text: str) -> str:
     - Fixing obvious double punctuation
     - Ensuring proper line endings
     """
-    import re
-    
     result = text
     
     # Normalize horizontal whitespace (tabs, multiple spaces -> single space)
-    result = re.sub(r'[^\S\n]+', ' ', result)
+    result = _WS_HORIZ.sub(' ', result)
     
     # Remove space before punctuation
-    result = re.sub(r'\s+([.,!?;:])', r'\1', result)
+    result = _SPACE_BEFORE_PUNCT.sub(r'\1', result)
     
     # Remove leading/trailing space on lines  
-    result = re.sub(r'^\s+', '', result, flags=re.MULTILINE)
-    result = re.sub(r'\s+$', '', result, flags=re.MULTILINE)
+    result = _LINE_LEADING_WS.sub('', result)
+    result = _LINE_TRAILING_WS.sub('', result)
     
     # Normalize multiple newlines to max 2 (paragraph break)
-    result = re.sub(r'\n{3,}', '\n\n', result)
+    result = _MULTI_NL.sub('\n\n', result)
     
     # Fix double punctuation (LLM sometimes outputs "..")
-    result = re.sub(r'\.{2,}', '.', result)
-    result = re.sub(r',{2,}', ',', result)
+    result = _MULTI_DOT.sub('.', result)
+    result = _MULTI_COMMA.sub(',', result)
     
     return result.strip()
 
@@ -784,24 +1629,22 @@ def sanitize_output(text: str) -> str:
     - "Answer:" or "Output:" prefixes
     - Asterisks from markdown formatting
     """
-    import re
-    
     result = text
     
     # Remove thinking mode artifacts
-    result = re.sub(r'/no_think\s*', '', result, flags=re.IGNORECASE)
-    result = re.sub(r'/think\s*', '', result, flags=re.IGNORECASE)
+    result = _NO_THINK.sub('', result)
+    result = _THINK.sub('', result)
     
     # Remove special tokens that might leak through
-    result = re.sub(r'<\|im_(?:start|end)\|>\s*', '', result)
-    result = re.sub(r'<\|endoftext\|>\s*', '', result)
+    result = _IM_TOKENS.sub('', result)
+    result = _ENDOFTEXT.sub('', result)
     
     # Remove common LLM prefixes
-    result = re.sub(r'^(?:Answer|Output|Response|Result|Here[\'s ]* (?:the|your)):\s*', '', result, flags=re.IGNORECASE)
+    result = _LLM_PREFIX.sub('', result)
     
     # Remove asterisks from markdown emphasis (but preserve content)
     # **text** -> text, *text* -> text
-    result = re.sub(r'\*{1,2}([^*]+)\*{1,2}', r'\1', result)
+    result = _MD_EMPHASIS.sub(r'\1', result)
     
     return result.strip()
 
@@ -817,32 +1660,19 @@ def is_list_formatting(original: str, polished: str) -> bool:
     
     Returns True if the transformation appears to be list formatting.
     """
-    import re
-    
-    # Comprehensive list marker patterns
-    list_patterns = [
-        # Numbered lists
-        r'^\s*\d+[\.\)]\s',           # 1. or 1) 
-        r'^\s*[ivxIVX]+[\.\)]\s',     # i. ii. iii. (roman numerals)
-        
-        # Lettered lists  
-        r'^\s*\([a-zA-Z]\)\s',        # (a) (b) (A) (B)
-        r'^\s*[a-zA-Z][\.\)]\s',      # a. b. or a) b)
-        
-        # Bullet points (comprehensive)
-        r'^\s*[-–—•●○◦◆◇▪▫★☆→►▸]\s',  # Common bullet chars
-        r'^\s*\*\s',                   # * markdown bullets
-    ]
+    # Fast path: the usual "- " / "1. " items, without splitting into lines
+    if sum(map(polished.count, _COMMON_LIST_MARKERS)) >= 2:
+        return True
     
     polished_lines = [l.strip() for l in polished.strip().split('\n') if l.strip()]
     
     # Count lines that match list patterns
     list_line_count = 0
     for line in polished_lines:
-        for pattern in list_patterns:
-            if re.match(pattern, line):
-                list_line_count += 1
-                break
+        if line[0] in _BULLET_CHARS and line[1:2].isspace():
+            list_line_count += 1
+        elif _ENUMERATED_LIST_ITEM.match(line):
+            list_line_count += 1
     
     # If polished has 2+ list items, it's formatting not summarization
     if list_line_count >= 2:
@@ -859,6 +1689,57 @@ def is_list_formatting(original: str, polished: str) -> bool:
     return False
 
 
+def _wc(text: str) -> int:
+    """
+    Cheap word count for sizing decisions (chunking, token budgets).
+    
+    Counts spaces and newlines instead of building a list of words, so runs
+    of whitespace over-count slightly. Keep len(text.split()) for the
+    word-ratio guards, where the count must be exact.
+    """
+    if not text or text.isspace():
+        return 0
+    return text.count(' ') + text.count('\n') + 1
+
+
+def _chunk_spans(text: str, separator: re.Pattern, max_words: int) -> list:
+    """
+    Greedily pack the pieces between separator matches into chunks of at
+    most max_words (a single oversized piece becomes its own chunk).
+    
+    Works on offsets into the original text and slices each chunk out once,
+    so the original separators between pieces are kept as-is.
+    """
+    chunks = []
+    chunk_start = 0
+    chunk_end = 0  # End offset of the last piece in the current chunk
+    chunk_words = 0
+    piece_start = 0
+    
+    for sep in itertools.chain(separator.finditer(text), (None,)):
+        piece_end = sep.start() if sep else len(text)
+        if piece_start == piece_end or text[piece_start:piece_end].isspace():
+            # Empty piece (e.g. after a trailing separator): no words, and
+            # never the start of a chunk of its own
+            piece_words = 0
+        else:
+            piece_words = text.count(' ', piece_start, piece_end) + text.count('\n', piece_start, piece_end) + 1
+        
+        if piece_words and chunk_words and chunk_words + piece_words > max_words:
+            chunks.append(text[chunk_start:chunk_end])
+            chunk_start = piece_start
+            chunk_words = piece_words
+        else:
+            chunk_words += piece_words
+        chunk_end = piece_end
+        
+        if sep:
+            piece_start = sep.end()
+    
+    chunks.append(text[chunk_start:chunk_end])
+    return chunks
+
+
 def chunk_text_by_paragraphs(text: str, max_words: int = 500) -> list:
     """
     Split text into chunks for long dictation handling.
@@ -871,54 +1752,43 @@ def chunk_text_by_paragraphs(text: str, max_words: int = 500) -> list:
     Returns:
         List of text chunks
     """
-    import re
-    
-    words = text.split()
-    if len(words) <= max_words:
+    if _wc(text) <= max_words:
         return [text]
     
     # Try to split on paragraph boundaries first
-    paragraphs = re.split(r'\n\n+', text)
-    if len(paragraphs) > 1:
-        chunks = []
-        current_chunk = []
-        current_words = 0
-        
-        for para in paragraphs:
-            para_words = len(para.split())
-            if current_words + para_words > max_words and current_chunk:
-                chunks.append('\n\n'.join(current_chunk))
-                current_chunk = [para]
-                current_words = para_words
-            else:
-                current_chunk.append(para)
-                current_words += para_words
-        
-        if current_chunk:
-            chunks.append('\n\n'.join(current_chunk))
-        
-        return chunks
+    if _PARAGRAPH_SPLIT.search(text):
+        return _chunk_spans(text, _PARAGRAPH_SPLIT, max_words)
     
     # No paragraph breaks - split by sentences
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    chunks = []
-    current_chunk = []
-    current_words = 0
-    
-    for sentence in sentences:
-        sentence_words = len(sentence.split())
-        if current_words + sentence_words > max_words and current_chunk:
-            chunks.append(' '.join(current_chunk))
-            current_chunk = [sentence]
-            current_words = sentence_words
-        else:
-            current_chunk.append(sentence)
-            current_words += sentence_words
+    return _chunk_spans(text, _SENTENCE_SPLIT, max_words)
+
+
+def chunk_text_evenly(text: str, max_words: int = 500) -> list:
+    """
+    Chunk text into as few chunks of at most max_words as the cap allows,
+    sized as evenly as the paragraph/sentence boundaries allow.
     
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+    Batched chunks decode in lockstep and prefill pads to the longest row,
+    so [400, 400, 400] finishes sooner than [500, 500, 200]. Chunks go to
+    the model as-is, so the separators at their edges are trimmed.
+    """
+    word_count = _wc(text)
+    chunk_count = -(-word_count // max_words)
+    if chunk_count <= 1:
+        return [text]
     
-    return chunks
+    # Smallest cap that still packs into chunk_count chunks (greedy packing
+    # only gets fewer chunks as the cap grows, so binary search it)
+    low, high = -(-word_count // chunk_count), max_words
+    best = chunk_text_by_paragraphs(text, max_words=high)
+    while low < high:
+        cap = (low + high) // 2
+        chunks = chunk_text_by_paragraphs(text, max_words=cap)
+        if len(chunks) <= chunk_count:
+            best, high = chunks, cap
+        else:
+            low = cap + 1
+    return [chunk.strip() for chunk in best]
 
 
 def handle_polish_text(pasted_text: str, final_text: str, mode: str = "clean") -> dict:
@@ -947,33 +1817,37 @@ def handle_polish_text(pasted_text: str, final_text: str, mode: str = "clean") -
         
         # Get appropriate prompt template
         prompt_template = get_polish_prompt(mode)
+        prompt_prefix = get_template_prefix(prompt_template)
         
-        # Check if text is too long and needs chunking
+        # Check if text is too long and needs chunking (exact count - the
+        # word-ratio guard below reuses it)
         word_count = len(final_text.split())
         
         if word_count > 1000:
             # Long dictation - process in chunks
             log(f"Long text detected ({word_count} words), processing in chunks")
-            chunks = chunk_text_by_paragraphs(final_text, max_words=500)
+            chunks = chunk_text_evenly(final_text, max_words=500)
             log(f"Split into {len(chunks)} chunks")
             
-            polished_chunks = []
-            for i, chunk in enumerate(chunks):
-                prompt = prompt_template.format(pasted_text="", final_text=chunk)
-                chunk_len = len(chunk.split())
-                max_tokens = min(chunk_len * 4 + 100, 1500)
-                
-                result = generate_text(
-                    model,
-                    tokenizer,
-                    prompt,
-                    max_tokens=max_tokens,
-                    fallback=chunk
-                )
-                
-                polished_chunk = result.strip() if result else chunk
-                polished_chunks.append(polished_chunk)
-                log(f"Processed chunk {i+1}/{len(chunks)}")
+            # All chunks decode together in one batch
+            prompts = [prompt_template.format(pasted_text="", final_text=chunk) for chunk in chunks]
+            # Per-chunk budget so short chunks don't hold their row open
+            max_tokens_list = [min(_wc(chunk) * 4 + 100, 1500) for chunk in chunks]
+            
+            results = generate_batch(
+                model,
+                tokenizer,
+                prompts,
+                max_tokens_list=max_tokens_list,
+                fallbacks=chunks,
+                prompt_prefix=prompt_prefix,
+            )
+            
+            polished_chunks = [
+                result.strip() if result else chunk
+                for result, chunk in zip(results, chunks)
+            ]
+            log(f"Processed {len(chunks)} chunks")
             
             # Join chunks with paragraph breaks
             polished = '\n\n'.join(polished_chunks)
@@ -989,7 +1863,9 @@ def handle_polish_text(pasted_text: str, final_text: str, mode: str = "clean") -
                 tokenizer, 
                 prompt, 
                 max_tokens=max_tokens,
-                fallback=final_text  # Return original if generation fails
+                fallback=final_text,  # Return original if generation fails
+                prompt_prefix=prompt_prefix,
+                kv_bits=DEEP_KV_BITS if model is _deep_model else None,
             )
             
             polished = result.strip() if result else final_text
@@ -1003,7 +1879,7 @@ def handle_polish_text(pasted_text: str, final_text: str, mode: str = "clean") -
         
         # Validate: LLM should not drastically shorten the text (over-summarization)
         # But list formatting legitimately reduces word count while adding structure
-        original_words = len(final_text.split())
+        original_words = word_count
         polished_words = len(polished.split())
         word_ratio = polished_words / max(original_words, 1)
         
@@ -1044,11 +1920,10 @@ def _clean_extract_result(result: str) -> str:
     if not result:
         return ""
     
-    import re
     cleaned = result.strip()
     
     # Remove markdown
-    cleaned = re.sub(r'\*+', '', cleaned)
+    cleaned = _ASTERISKS.sub('', cleaned)
     
     # Remove explanatory prefixes
     for prefix in ['are:', 'answer:', 'output:', 'new words:']:
@@ -1076,13 +1951,8 @@ def _extract_looks_suspicious(result: str, pasted_end: str, tail_words: str) ->
     if len(result_clean) > len(tail_words) + 10:
         return True
     
-    # 2. Contains explanatory text
-    lower = result_clean.lower()
-    if any(marker in lower for marker in ['answer:', 'the new words', 'result:', 'here is']):
-        return True
-    
-    # 3. Contains markdown
-    if '**' in result_clean or '```' in result_clean:
+    # 2-3. Contains explanatory text or markdown
+    if _EXTRACT_SUSPICIOUS.search(result_clean):
         return True
     
     # 4. Contains the pasted end (should only contain tail words)
@@ -1114,28 +1984,43 @@ def handle_extract_new_words(pasted_end: str, tail_words: str) -> dict:
     try:
         log(f"[Extract] Request: pasted_end_len={len(pasted_end)}, tail_words_len={len(tail_words)}")
         
-        # Limit context for speed
-        pasted_context = pasted_end[-100:] if len(pasted_end) > 100 else pasted_end
-        tail_context = tail_words[:200] if len(tail_words) > 200 else tail_words
-        prompt = get_extract_new_words_prompt().format(pasted_end=pasted_context, tail_words=tail_context)
+        cache_key = ("extract_new_words", pasted_end, tail_words)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            elapsed = int((time.time() - start) * 1000)
+            log(f"[Extract] Cache hit: new_words='{cached['new_words']}', time={elapsed}ms")
+            return {
+                "type": "extract_result",
+                **cached,
+                "inference_time_ms": elapsed,
+                "exceeded_latency": False,
+                "cached": True,
+            }
+        
+        prompt, prompt_prefix = _extract_new_words_prompt(pasted_end, tail_words)
         
         # Try fast model first
+        failures_before = _generation_failures
         model, tokenizer = load_fast_model()
         inference_start = time.time()
-        result = generate_text(model, tokenizer, prompt, max_tokens=100)
+        result = generate_text(model, tokenizer, prompt, max_tokens=100, prompt_prefix=prompt_prefix, answer_stops=SINGLE_LINE_STOPS)
         fast_time = int((time.time() - inference_start) * 1000)
         
         new_words = _clean_extract_result(result)
         used_quality = False
         
         # Check if result looks suspicious
-        if _extract_looks_suspicious(result, pasted_end, tail_words):
+        suspicious = _extract_looks_suspicious(result, pasted_end, tail_words)
+        if suspicious and quality_retry_allowed():
             log(f"[Extract] Fast model result suspicious ('{result[:50]}...'), retrying with quality model")
             
             # Retry with quality model
             model, tokenizer = load_quality_model()
             inference_start = time.time()
-            result = generate_text(model, tokenizer, prompt, max_tokens=100)
+            result = generate_text(
+                model, tokenizer, prompt, max_tokens=100, prompt_prefix=prompt_prefix,
+                answer_stops=SINGLE_LINE_STOPS, draft_model=_fast_model,
+            )
             quality_time = int((time.time() - inference_start) * 1000)
             
             new_words = _clean_extract_result(result)
@@ -1146,6 +2031,9 @@ def handle_extract_new_words(pasted_end: str, tail_words: str) -> dict:
         exceeded = elapsed > LATENCY_THRESHOLD_MERGE
         
         log(f"[Extract] Complete: new_words_len={len(new_words)}, total={elapsed}ms, exceeded={exceeded}, used_quality={used_quality}")
+        # Don't pin a fallback, or a suspicious answer whose retry was skipped
+        if _generation_failures == failures_before and (used_quality or not suspicious):
+            cache_response(cache_key, {"new_words": new_words, "used_quality_model": used_quality})
         
         return {
             "type": "extract_result",
@@ -1213,8 +2101,13 @@ def handle_deep_cleanup(sentence: str, checksum: str, gpu_busy: bool = False) ->
                 "inference_time_ms": 0,
             }
         
+        # Counted once: sizes the token budget and the word-ratio guard
+        original_words = len(sentence.split())
+        
         # Format prompt
-        prompt = get_deep_cleanup_prompt().format(sentence=sentence)
+        prompt_template = get_deep_cleanup_prompt()
+        prompt = prompt_template.format(sentence=sentence)
+        prompt_prefix = get_template_prefix(prompt_template)
         
         # Generate with deep model
         inference_start = time.time()
@@ -1222,8 +2115,10 @@ def handle_deep_cleanup(sentence: str, checksum: str, gpu_busy: bool = False) ->
             model, 
             tokenizer, 
             prompt, 
-            max_tokens=len(sentence.split()) * 3 + 50,  # Allow expansion
-            fallback=sentence
+            max_tokens=original_words * 3 + 50,  # Allow expansion
+            fallback=sentence,
+            prompt_prefix=prompt_prefix,
+            kv_bits=DEEP_KV_BITS,
         )
         inference_time = int((time.time() - inference_start) * 1000)
         
@@ -1232,7 +2127,6 @@ def handle_deep_cleanup(sentence: str, checksum: str, gpu_busy: bool = False) ->
         cleaned = normalize_output(cleaned)
         
         # Validate: result shouldn't be drastically different
-        original_words = len(sentence.split())
         cleaned_words = len(cleaned.split())
         word_ratio = cleaned_words / max(original_words, 1)
         
@@ -1288,6 +2182,8 @@ def handle_get_status() -> dict:
         "fast_model_loaded": _fast_model is not None,
         "quality_model_loaded": _quality_model is not None,
         "deep_model_loaded": _deep_model is not None,
+        "model_state": _model_state,
+        "quality_retry_enabled": quality_retry_allowed(),
     }
 
 
@@ -1299,10 +2195,10 @@ def cleanup_all_models() -> None:
     """Force cleanup of all loaded models - call before exit or on memory pressure."""
     global _fast_model, _fast_tokenizer, _quality_model, _quality_tokenizer
     global _deep_model, _deep_tokenizer
-    import gc
     
     log("[Memory] Cleaning up all models...")
     
+    drop_prefix_caches()
     _fast_model = None
     _fast_tokenizer = None
     _quality_model = None
@@ -1313,7 +2209,6 @@ def cleanup_all_models() -> None:
     gc.collect()
     
     try:
-        import mlx.core as mx
         mx.metal.clear_cache()
         log("[Memory] All models unloaded, MLX cache cleared")
     except Exception as e:
@@ -1322,105 +2217,200 @@ def cleanup_all_models() -> None:
 
 def initialize() -> None:
     """Initialize the LLM server - load fast model"""
+    global _deep_prewarm_pending
     log("Initializing LLM server...")
     
     # Register cleanup handler for graceful shutdown
-    import atexit
     atexit.register(cleanup_all_models)
     
     try:
+        init_prompts()
+        
         # Load fast model on startup for immediate availability
         load_start = time.time()
         load_fast_model()
         load_time = int((time.time() - load_start) * 1000)
         
+        # Warm up before signalling ready so the first paste doesn't pay for it
+        warmup_time = warmup_fast_model()
+        
         # Signal ready with load time
-        print(json.dumps({
+        send_message({
             "type": "ready",
-            "fast_model_load_time_ms": load_time
-        }), flush=True)
+            "fast_model_load_time_ms": load_time,
+            "fast_model_warmup_time_ms": warmup_time,
+        })
         log("Server ready")
         
+        if os.environ.get(PREWARM_DEEP_ENV) == "1":
+            # Loaded by the main loop once it's idle (see run_idle_model_swaps)
+            _deep_prewarm_pending = True
+        
     except Exception as e:
         log(f"ERROR during initialization: {e}")
         traceback.print_exc(file=sys.stderr)
-        print(json.dumps({"type": "error", "error": str(e)}), flush=True)
+        send_message({"type": "error", "error": str(e)})
+
+
+def dispatch_command(command: dict) -> dict:
+    """Run a single parsed command and return its response."""
+    action = command.get("action", "")
+    
+    if action == "merge_text":
+        return handle_merge_text(
+            command.get("pasted", ""),
+            command.get("new_text", "")
+        )
+    
+    elif action == "correct_sentence":
+        return handle_correct_sentence(
+            command.get("original", ""),
+            command.get("latest", "")
+        )
+    
+    elif action == "polish_text":
+        return handle_polish_text(
+            command.get("pasted_text", ""),
+            command.get("final_text", ""),
+            command.get("mode", "clean")
+        )
+    
+    elif action == "extract_new_words":
+        return handle_extract_new_words(
+            command.get("pasted_end", ""),
+            command.get("tail_words", "")
+        )
+    
+    elif action == "deep_cleanup":
+        return handle_deep_cleanup(
+            command.get("sentence", ""),
+            command.get("checksum", ""),
+            command.get("gpu_busy", False)
+        )
+    
+    elif action == "swap_to_realtime":
+        # Called when speech resumes - free memory for real-time
+        swap_to_realtime_mode()
+        return {
+            "type": "swap_result",
+            "mode": "realtime",
+            "deep_model_loaded": _deep_model is not None,
+        }
+    
+    elif action == "get_status":
+        return handle_get_status()
+    
+    return {"type": "error", "error": f"Unknown action: {action}"}
+
+
+def start_stdin_reader() -> queue.Queue:
+    """Read stdin lines on a background thread so the main loop can see what's pending."""
+    lines: queue.Queue = queue.Queue()
+    
+    def reader() -> None:
+        for line in sys.stdin:
+            lines.put(line)
+        lines.put(None)  # EOF
+    
+    threading.Thread(target=reader, name="stdin-reader", daemon=True).start()
+    return lines
+
+
+def collect_batch(lines: queue.Queue, first: str) -> list:
+    """
+    Collect commands arriving within BATCH_WINDOW_S after a real-time command.
+    
+    Stops early at EOF (the None sentinel is kept so the main loop sees it)
+    or once BATCH_MAX_COMMANDS are pending.
+    """
+    batch = [first]
+    deadline = time.time() + BATCH_WINDOW_S
+    while len(batch) < BATCH_MAX_COMMANDS:
+        remaining = deadline - time.time()
+        try:
+            line = lines.get(timeout=remaining) if remaining > 0 else lines.get_nowait()
+        except queue.Empty:
+            break
+        batch.append(line)
+        if line is None:
+            break
+    return batch
+
+
+def parse_command(line: Optional[str]) -> Any:
+    """Parse a stdin line for batch planning; None for blank or invalid lines."""
+    if not line or not line.strip():
+        return None
+    try:
+        return decode_message(line)
+    except json.JSONDecodeError:
+        return None
 
 
 def main() -> None:
     """Main command loop"""
     initialize()
     
-    for line in sys.stdin:
+    lines = start_stdin_reader()
+    
+    while True:
         try:
-            line = line.strip()
-            if not line:
-                continue
-            
-            command = json.loads(line)
-            action = command.get("action", "")
-            
-            if action == "merge_text":
-                result = handle_merge_text(
-                    command.get("pasted", ""),
-                    command.get("new_text", "")
-                )
-            
-            elif action == "correct_sentence":
-                result = handle_correct_sentence(
-                    command.get("original", ""),
-                    command.get("latest", "")
-                )
-            
-            elif action == "polish_text":
-                result = handle_polish_text(
-                    command.get("pasted_text", ""),
-                    command.get("final_text", ""),
-                    command.get("mode", "clean")
-                )
-            
-            elif action == "extract_new_words":
-                result = handle_extract_new_words(
-                    command.get("pasted_end", ""),
-                    command.get("tail_words", "")
-                )
-            
-            elif action == "deep_cleanup":
-                result = handle_deep_cleanup(
-                    command.get("sentence", ""),
-                    command.get("checksum", ""),
-                    command.get("gpu_busy", False)
-                )
-            
-            elif action == "swap_to_realtime":
-                # Called when speech resumes - free memory for real-time
-                swap_to_realtime_mode()
-                result = {
-                    "type": "swap_result",
-                    "mode": "realtime",
-                    "deep_model_loaded": _deep_model is not None,
-                }
-            
-            elif action == "get_status":
-                result = handle_get_status()
-            
-            elif action == "quit":
-                log("Shutting down...")
+            line = lines.get(timeout=SILENCE_WATCH_INTERVAL_S)
+        except queue.Empty:
+            # Nothing pending - swap models now, between requests
+            try:
+                run_idle_model_swaps()
+            except Exception as e:
+                log(f"[Memory] Idle model swap failed: {e}")
+            continue
+        if line is None:
+            break
+        
+        batch = [line]
+        first = parse_command(line)
+        if isinstance(first, dict) and first.get("action") in BATCHABLE_ACTIONS:
+            # Let real-time commands pending within the window share one generate call
+            batch = collect_batch(lines, line)
+            prefetch_fast_batch([c for c in map(parse_command, batch) if isinstance(c, dict)])
+        
+        should_quit = False
+        for line in batch:
+            if line is None:
+                should_quit = True
                 break
             
-            else:
-                result = {"type": "error", "error": f"Unknown action: {action}"}
-            
-            print(json.dumps(result), flush=True)
-            
-        except json.JSONDecodeError as e:
-            log(f"Invalid JSON: {e}")
-            print(json.dumps({"type": "error", "error": f"Invalid JSON: {e}"}), flush=True)
-            
-        except Exception as e:
-            log(f"Error processing command: {e}")
-            traceback.print_exc(file=sys.stderr)
-            print(json.dumps({"type": "error", "error": str(e)}), flush=True)
+            try:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                command = decode_message(line)
+                
+                if command.get("action", "") == "quit":
+                    log("Shutting down...")
+                    should_quit = True
+                    break
+                
+                if command.get("action", "") in BATCHABLE_ACTIONS:
+                    note_voice_activity()
+                
+                result = dispatch_command(command)
+                send_message(result)
+                
+            except json.JSONDecodeError as e:
+                log(f"Invalid JSON: {e}")
+                send_message({"type": "error", "error": f"Invalid JSON: {e}"})
+                
+            except Exception as e:
+                log(f"Error processing command: {e}")
+                traceback.print_exc(file=sys.stderr)
+                send_message({"type": "error", "error": str(e)})
+        
+        # Drop batched outputs a handler didn't end up using
+        _prefetched_generations.clear()
+        
+        if should_quit:
+            break
 
 
 if __name__ == "__main__":
@@ -17,6 +17,54 @@ except ImportError as e:
     print(json.dumps({"error": f"Missing dependency: {e}"}))
     sys.exit(0)
 
+try:
+    import soxr  # Anti-aliased SIMD resampling (falls back to linear interpolation)
+except ImportError:
+    soxr = None
+
+WHISPER_SAMPLE_RATE = 16000
+STREAM_BLOCK_SECONDS = 2  # Decode/resample granularity when streaming through soxr
+
+
+def resample_audio(audio: "np.ndarray", sample_rate: int, target_rate: int = WHISPER_SAMPLE_RATE) -> "np.ndarray":
+    """Resample float32 audio to target_rate (Whisper expects 16kHz)."""
+    if soxr is not None:
+        return soxr.resample(audio, sample_rate, target_rate)
+    
+    # Simple linear resampling, kept in float32
+    target_length = int(len(audio) * target_rate / sample_rate)
+    positions = np.linspace(0, len(audio) - 1, target_length, dtype=np.float32)
+    return np.interp(positions, np.arange(len(audio), dtype=np.float32), audio).astype(np.float32)
+
+
+def load_audio(audio_file: str) -> "np.ndarray":
+    """
+    Decode an audio file to 16kHz mono float32.
+    
+    With soxr, the file is decoded, downmixed and resampled block by block,
+    so only the 16kHz output is ever held in full.
+    """
+    with sf.SoundFile(audio_file) as f:
+        sample_rate = f.samplerate
+        
+        if soxr is None or sample_rate == WHISPER_SAMPLE_RATE:
+            # float32 end to end: matches Whisper's mel input and halves the bytes moved
+            audio = f.read(dtype='float32')
+            if audio.ndim > 1:
+                audio = audio.mean(axis=1, dtype=np.float32)
+            if sample_rate != WHISPER_SAMPLE_RATE:
+                audio = resample_audio(audio, sample_rate)
+            return audio
+        
+        stream = soxr.ResampleStream(sample_rate, WHISPER_SAMPLE_RATE, 1, dtype='float32')
+        pieces = []
+        for block in f.blocks(blocksize=sample_rate * STREAM_BLOCK_SECONDS, dtype='float32'):
+            if block.ndim > 1:
+                block = block.mean(axis=1, dtype=np.float32)
+            pieces.append(stream.resample_chunk(block))
+        pieces.append(stream.resample_chunk(np.empty(0, dtype=np.float32), last=True))
+        return np.concatenate(pieces)
+
 
 def transcribe_audio(audio_file: str, model_name: str = "mlx-community/whisper-tiny") -> dict:
     """
@@ -37,30 +85,13 @@ def transcribe_audio(audio_file: str, model_name: str = "mlx-community/whisper-t
         
         # soundfile can handle WebM/Opus via libsndfile
         # If it fails, we'll catch and report the error
+        # Mono 16kHz float32 (Whisper expects 16kHz)
         try:
-            audio, sample_rate = sf.read(audio_file)
+            audio = load_audio(audio_file)
         except Exception as e:
             # WebM might not be supported, return helpful error
-            import sys
-            print(json.dumps({"error": f"Audio format not supported. WebM/Opus may not be readable by soundfile. Error: {str(e)}"}))
-            sys.exit(0)
-            return {"error": f"Audio format not supported: {str(e)}. Try installing ffmpeg."}
-        
-        # Convert stereo to mono if needed
-        if len(audio.shape) > 1:
-            audio = audio.mean(axis=1)
-        
-        # Resample to 16kHz if needed (Whisper expects 16kHz)
-        if sample_rate != 16000:
-            # Simple resampling
-            duration = len(audio) / sample_rate
-            target_length = int(duration * 16000)
-            audio = np.interp(
-                np.linspace(0, len(audio), target_length),
-                np.arange(len(audio)),
-                audio
-            )
-            sample_rate = 16000
+            # (returned rather than exiting so --serve keeps running)
+            return {"error": f"Audio format not supported. WebM/Opus may not be readable by soundfile. Error: {str(e)}"}
         
         # Transcribe using mlx-whisper
         result = mlx_whisper.transcribe(
@@ -79,12 +110,47 @@ def transcribe_audio(audio_file: str, model_name: str = "mlx-community/whisper-t
         return {"error": f"Transcription failed: {str(e)}"}
 
 
+def serve(model_name: str) -> None:
+    """
+    JSON-lines mode: transcribe many files in one process.
+    
+    mlx_whisper keeps the last loaded model in memory, so the weights load
+    on the first request only. Commands: {"audio": path, "model"?: name}
+    and {"action": "quit"}; one JSON result line per command.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            command = json.loads(line)
+        except json.JSONDecodeError as e:
+            result = {"error": f"Invalid JSON: {e}"}
+        else:
+            if command.get("action") == "quit":
+                break
+            if "audio" not in command:
+                result = {"error": "Missing 'audio' path"}
+            else:
+                result = transcribe_audio(command["audio"], command.get("model", model_name))
+        
+        print(json.dumps(result), flush=True)
+
+
 def main():
     parser = argparse.ArgumentParser(description="MLX Audio STT Bridge")
-    parser.add_argument("--audio", required=True, help="Path to audio file")
+    parser.add_argument("--audio", help="Path to audio file")
     parser.add_argument("--model", default="mlx-community/whisper-tiny", help="Model name")
+    parser.add_argument("--serve", action="store_true", help="Read JSON commands from stdin, keeping the model loaded")
     args = parser.parse_args()
     
+    if args.serve:
+        serve(args.model)
+        return
+    if not args.audio:
+        parser.error("--audio is required unless --serve is given")
+    
     result = transcribe_audio(args.audio, args.model)
     print(json.dumps(result))
 
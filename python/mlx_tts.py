@@ -13,10 +13,23 @@ try:
     from mlx_audio.tts.models.kokoro import KokoroPipeline
     from mlx_audio.tts.utils import load_model
     import soundfile as sf
+    import numpy as np
 except ImportError as e:
     print(json.dumps({"error": f"Missing dependency: {e}"}), file=sys.stderr)
     sys.exit(1)
 
+# Kokoro pipelines by (model_id, lang_code), so --serve loads weights once
+_pipelines = {}
+
+
+def get_pipeline(model_id: str, lang_code: str) -> "KokoroPipeline":
+    """Load the model and build its pipeline on first use."""
+    key = (model_id, lang_code)
+    if key not in _pipelines:
+        model = load_model(model_id)
+        _pipelines[key] = KokoroPipeline(lang_code=lang_code, model=model, repo_id=model_id)
+    return _pipelines[key]
+
 
 def synthesize_speech(
     text: str,
@@ -41,48 +54,89 @@ def synthesize_speech(
         Dictionary with synthesis result
     """
     try:
-        # Load model (cached after first load)
-        model = load_model(model_id)
-        
-        # Create pipeline
-        pipeline = KokoroPipeline(lang_code=lang_code, model=model, repo_id=model_id)
+        # Load model and pipeline (cached after first load)
+        pipeline = get_pipeline(model_id, lang_code)
         
-        # Generate audio
-        audio_data = None
+        # Generate audio - one chunk per paragraph, all kept
+        all_audio = []
         sample_rate = 24000
         
         for _, _, audio in pipeline(text, voice=voice, speed=speed, split_pattern=r'\n+'):
-            audio_data = audio
-            break  # Take first chunk for now
+            if audio is not None and len(audio) > 0:
+                all_audio.append(audio[0])
         
-        if audio_data is None:
+        if not all_audio:
             return {"error": "No audio generated"}
         
+        audio_data = all_audio[0] if len(all_audio) == 1 else np.concatenate(all_audio)
+        
         # Save audio file
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        sf.write(str(output_path), audio_data[0], sample_rate)
+        sf.write(str(output_path), audio_data, sample_rate)
         
         return {
             "output_file": str(output_path),
             "sample_rate": sample_rate,
-            "duration": len(audio_data[0]) / sample_rate
+            "duration": len(audio_data) / sample_rate
         }
         
     except Exception as e:
         return {"error": f"Synthesis failed: {str(e)}"}
 
 
+def serve(args: argparse.Namespace) -> None:
+    """
+    JSON-lines mode: synthesize many texts in one process with a cached pipeline.
+    
+    Commands: {"text": str, "output": path, "voice"?, "speed"?, "model"?, "lang"?}
+    (missing fields default to the command-line values) and {"action": "quit"};
+    one JSON result line per command.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            command = json.loads(line)
+        except json.JSONDecodeError as e:
+            result = {"error": f"Invalid JSON: {e}"}
+        else:
+            if command.get("action") == "quit":
+                break
+            if "text" not in command or "output" not in command:
+                result = {"error": "Missing 'text' or 'output'"}
+            else:
+                result = synthesize_speech(
+                    command["text"],
+                    command["output"],
+                    voice=command.get("voice", args.voice),
+                    speed=command.get("speed", args.speed),
+                    model_id=command.get("model", args.model),
+                    lang_code=command.get("lang", args.lang)
+                )
+        
+        print(json.dumps(result), flush=True)
+
+
 def main():
     parser = argparse.ArgumentParser(description="MLX Audio TTS Bridge")
-    parser.add_argument("--text", required=True, help="Text to synthesize")
-    parser.add_argument("--output", required=True, help="Output audio file path")
+    parser.add_argument("--text", help="Text to synthesize")
+    parser.add_argument("--output", help="Output audio file path")
     parser.add_argument("--voice", default="af_heart", help="Voice ID")
     parser.add_argument("--speed", type=float, default=1.0, help="Speech speed")
     parser.add_argument("--model", default="prince-canuma/Kokoro-82M", help="Model ID")
     parser.add_argument("--lang", default="a", help="Language code")
+    parser.add_argument("--serve", action="store_true", help="Read JSON commands from stdin, keeping the model loaded")
     args = parser.parse_args()
     
+    if args.serve:
+        serve(args)
+        return
+    if not args.text or not args.output:
+        parser.error("--text and --output are required unless --serve is given")
+    
     result = synthesize_speech(
         args.text,
         args.output,
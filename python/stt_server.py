@@ -118,9 +118,11 @@ Test scenarios:
 """
 
 import sys
+import io
 import json
 import os
 import platform
+import re
 import time
 import tempfile
 import threading
@@ -145,11 +147,35 @@ except ImportError as e:
     print(json.dumps({"type": "error", "error": f"Missing dependency: {e}"}), flush=True)
     sys.exit(1)
 
+# In-memory feature path (older parakeet-mlx builds fall back to a temp WAV file)
+try:
+    import mlx.core as mx
+    from parakeet_mlx.audio import get_logmel
+except ImportError:
+    mx = None
+    get_logmel = None
+
+try:
+    import soxr  # Anti-aliased polyphase resampling for transcribe_file
+except ImportError:
+    soxr = None
+
+try:
+    import orjson  # C JSON codec for large pcm_base64 command lines
+except ImportError:
+    orjson = None
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # MODEL CONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════════
 PARAKEET_MODEL = "mlx-community/parakeet-tdt-0.6b-v3"
 
+# Quantize Parakeet's Linear layers at load (None keeps the published weights).
+# Per-chunk inference is weight-bandwidth bound, so 4-bit weights cut the bytes
+# moved per forward pass; convolutions and norms stay in full precision.
+PARAKEET_QUANTIZE_BITS = 4
+PARAKEET_QUANTIZE_GROUP_SIZE = 64
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CHUNK-AND-COMMIT PARAMETERS - TUNED FOR SMOOTH LIVE PASTE
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -187,14 +213,39 @@ FORCE_COMMIT_SECONDS = 8
 # 0.8s ensures at least a few words per chunk
 MIN_CHUNK_SECONDS = 0.8
 
+# AUDIO_BUFFER_INITIAL_SECONDS: Starting capacity of the server-side session audio
+# buffer used by the delta protocol (grows by doubling for longer sessions)
+AUDIO_BUFFER_INITIAL_SECONDS = 60
+
+# SPEECH_RMS_HISTORY_SIZE: Recent clear-speech RMS values averaged to calibrate
+# low-volume noise rejection
+SPEECH_RMS_HISTORY_SIZE = 50
+
+# WARMUP_CHUNK_SECONDS: Extra warmup lengths covering the chunk sizes seen live
+# (shortest transcribed chunk up to a force commit), so the first real chunk of
+# each size doesn't pay for new Metal kernels and buffer allocations
+WARMUP_CHUNK_SECONDS = (MIN_CHUNK_SECONDS, 2, 4, FORCE_COMMIT_SECONDS)
+
 # Derived values (in samples)
 SILENCE_SAMPLES = int(SILENCE_DURATION_FOR_COMMIT * SAMPLE_RATE)
 FORCE_COMMIT_SAMPLES = FORCE_COMMIT_SECONDS * SAMPLE_RATE
 MIN_CHUNK_SAMPLES = int(MIN_CHUNK_SECONDS * SAMPLE_RATE)
+MS_PER_SAMPLE = 1000.0 / SAMPLE_RATE  # 0.0625, exact in binary
 
 # Global state
 _model = None
 _model_loaded = False
+_warmup_audio = None  # Decoded warmup_audio.wav, loaded once (see get_warmup_audio)
+
+
+def sum_of_squares(audio: np.ndarray) -> float:
+    """Sum of squared samples in one fused pass (no audio ** 2 temporary)."""
+    return float(np.dot(audio, audio))
+
+
+def rms_from_sum_of_squares(sumsq: float, num_samples: int) -> float:
+    """RMS of a region from its sum of squares."""
+    return (sumsq / num_samples) ** 0.5 if num_samples else 0.0
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CHUNK TRACKER - Core State Machine for Chunk-and-Commit
@@ -226,6 +277,16 @@ class ChunkTracker:
     only processes the uncommitted portion (typically <8 seconds).
     """
     
+    # Fixed attribute set: no per-instance __dict__, and a typo'd attribute
+    # raises instead of silently creating new state
+    __slots__ = (
+        'committed_text', 'committed_samples', 'last_commit_sample',
+        'silence_sample_count', 'pending_audio',
+        'speech_rms_history', 'speech_rms_sum', 'average_speech_rms',
+        'last_partial_text', 'last_processed_sample',
+        'audio', 'audio_length',
+    )
+    
     def __init__(self):
         # All committed text - IMMUTABLE once set
         # Frontend appends this, never reconciles it
@@ -248,9 +309,47 @@ class ChunkTracker:
         
         # Low-volume detection: track normal speech RMS to detect background noise
         # If audio is above silence threshold but far below normal speech, skip it
-        self.speech_rms_history = []
+        self.speech_rms_history = deque(maxlen=SPEECH_RMS_HISTORY_SIZE)
+        self.speech_rms_sum = 0.0  # Running sum of speech_rms_history (O(1) mean)
         self.average_speech_rms = 0.08  # Initial estimate (good speech is ~0.05-0.15)
         
+        # Silence gate: text of the last inference and the sample position it
+        # covered. If only silence arrives after that, the partial can't change,
+        # so the next poll reuses it instead of running the model again
+        self.last_partial_text = None
+        self.last_processed_sample = 0
+        
+        # Session audio received so far (delta protocol): the frontend sends only
+        # samples after audio_length, and we append them here instead of
+        # re-decoding the whole recording every request
+        self.audio = np.empty(AUDIO_BUFFER_INITIAL_SECONDS * SAMPLE_RATE, dtype=np.float32)
+        self.audio_length = 0
+        
+    def append_audio(self, delta: np.ndarray, start_sample: int) -> bool:
+        """
+        Append new samples at start_sample (0 restarts the buffer).
+        
+        Returns False if start_sample doesn't continue the buffered audio
+        (frontend and server out of sync - frontend resends from 0).
+        """
+        if start_sample == 0:
+            self.audio_length = 0
+        elif start_sample != self.audio_length:
+            return False
+        
+        end = self.audio_length + len(delta)
+        if end > len(self.audio):
+            grown = np.empty(max(end, 2 * len(self.audio)), dtype=np.float32)
+            grown[:self.audio_length] = self.audio[:self.audio_length]
+            self.audio = grown
+        self.audio[self.audio_length:end] = delta
+        self.audio_length = end
+        return True
+    
+    def buffered_audio(self) -> np.ndarray:
+        """View of the session audio received so far (no copy)."""
+        return self.audio[:self.audio_length]
+        
     def reset(self):
         """Reset for new recording session."""
         self.committed_text = ""
@@ -258,46 +357,50 @@ class ChunkTracker:
         self.last_commit_sample = 0
         self.silence_sample_count = 0
         self.pending_audio = None
+        self.audio_length = 0  # Keep the allocation for the next session
+        self.last_partial_text = None
+        self.last_processed_sample = 0
         # Keep speech RMS history across resets for better calibration
-        # Only clear if history is stale (>100 samples)
-        if len(self.speech_rms_history) > 100:
-            self.speech_rms_history = self.speech_rms_history[-50:]
+        # (the deque's maxlen already bounds it)
         
     def should_force_commit(self, current_sample: int) -> bool:
         """Check if we should force commit due to duration."""
         samples_since_commit = current_sample - self.last_commit_sample
         return samples_since_commit >= FORCE_COMMIT_SAMPLES
     
-    def detect_silence(self, audio_chunk: np.ndarray) -> bool:
-        """Detect if chunk is silence and track consecutive silence."""
-        rms = np.sqrt(np.mean(audio_chunk ** 2))
+    def detect_silence(self, rms: float, num_samples: int) -> bool:
+        """Detect if a chunk (given its RMS and length) is silence and track consecutive silence."""
         is_silence = rms < SILENCE_THRESHOLD
         
         if is_silence:
-            self.silence_sample_count += len(audio_chunk)
+            self.silence_sample_count += num_samples
         else:
             self.silence_sample_count = 0
             # Update speech RMS average when we have actual speech
             if rms > SILENCE_THRESHOLD * 2:  # Clear speech, not borderline
+                if len(self.speech_rms_history) == SPEECH_RMS_HISTORY_SIZE:
+                    # append() below evicts the oldest entry
+                    self.speech_rms_sum -= self.speech_rms_history[0]
                 self.speech_rms_history.append(rms)
-                if len(self.speech_rms_history) > 50:
-                    self.speech_rms_history.pop(0)
-                self.average_speech_rms = sum(self.speech_rms_history) / len(self.speech_rms_history)
+                self.speech_rms_sum += rms
+                self.average_speech_rms = self.speech_rms_sum / len(self.speech_rms_history)
             
         return self.silence_sample_count >= SILENCE_SAMPLES
     
-    def is_low_volume_noise(self, audio_chunk: np.ndarray) -> bool:
+    def is_low_volume_noise(self, rms: float) -> bool:
         """
         Detect if audio is low-volume background noise (above silence, below speech).
         
         This catches background TV, distant conversations, etc. that Parakeet might
         transcribe as gibberish fragments like "Yeah. No, no, no."
         
+        Args:
+            rms: RMS of the uncommitted audio
+        
         Returns:
             True if audio is likely background noise (should skip transcription)
         """
-        rms = np.sqrt(np.mean(audio_chunk ** 2))
-        
+
         # Above silence threshold (not silence)
         if rms <= SILENCE_THRESHOLD:
             return False  # It's silence, not noise
@@ -370,6 +473,7 @@ class ChunkTracker:
         # Reset silence tracking for next chunk
         self.silence_sample_count = 0
         self.pending_audio = None
+        self.last_partial_text = None
         
         sys.stderr.write(f"[STT] COMMITTED at sample {sample_position}: \"{text[:50]}...\"\n")
         sys.stderr.flush()
@@ -386,13 +490,11 @@ def initialize():
         return True
     
     try:
-        from parakeet_mlx import from_pretrained
-        
         sys.stderr.write("[STT] Loading Parakeet model...\n")
         sys.stderr.flush()
         
         load_start = time.time()
-        _model = from_pretrained(PARAKEET_MODEL)
+        _model = load_model()
         load_time = (time.time() - load_start) * 1000
         
         sys.stderr.write(f"[STT] Model loaded in {load_time:.0f}ms\n")
@@ -404,19 +506,11 @@ def initialize():
         
         warmup_start = time.time()
         
-        warmup_path = os.path.join(os.path.dirname(__file__), 'warmup_audio.wav')
-        if os.path.exists(warmup_path):
-            try:
-                warmup_audio, rate = sf.read(warmup_path, dtype='float32')
-                if rate != 16000:
-                    import librosa
-                    warmup_audio = librosa.resample(warmup_audio, orig_sr=rate, target_sr=16000)
-            except Exception as e:
-                warmup_audio = np.zeros(16000 * 3, dtype=np.float32)
-        else:
-            warmup_audio = np.zeros(16000 * 3, dtype=np.float32)
-        
+        warmup_audio = get_warmup_audio()
         _transcribe_audio(warmup_audio)
+        for seconds in WARMUP_CHUNK_SECONDS:
+            # np.resize tiles the speech sample out to the chunk length
+            _transcribe_audio(np.resize(warmup_audio, int(seconds * SAMPLE_RATE)))
         warmup_time = (time.time() - warmup_start) * 1000
         
         sys.stderr.write(f"[STT] Warmup complete in {warmup_time:.0f}ms - ready\n")
@@ -435,17 +529,92 @@ def initialize():
         return False
 
 
+def get_warmup_audio() -> np.ndarray:
+    """
+    Warmup speech sample at 16kHz, decoded on first use and cached.
+    
+    Falls back to 3s of silence if warmup_audio.wav is missing or unreadable.
+    """
+    global _warmup_audio
+    
+    if _warmup_audio is None:
+        warmup_path = os.path.join(os.path.dirname(__file__), 'warmup_audio.wav')
+        audio = None
+        if os.path.exists(warmup_path):
+            try:
+                audio, rate = sf.read(warmup_path, dtype='float32')
+                if rate != SAMPLE_RATE:
+                    audio = _resample_to_16k(audio, rate)
+            except Exception:
+                audio = None
+        _warmup_audio = audio if audio is not None else np.zeros(SAMPLE_RATE * 3, dtype=np.float32)
+    
+    return _warmup_audio
+
+
+def load_model():
+    """
+    Parakeet as the server runs it (quantized per PARAKEET_QUANTIZE_BITS).
+    
+    Loaded once per process and cached; the STT test scripts use this too, so
+    they measure the same model and a driver running several of them in one
+    interpreter loads it once.
+    """
+    global _model
+    
+    if _model is None:
+        from parakeet_mlx import from_pretrained
+        
+        model = from_pretrained(PARAKEET_MODEL)
+        if PARAKEET_QUANTIZE_BITS is not None:
+            _quantize_model(model)
+        _model = model
+    return _model
+
+
+def _quantize_model(model) -> None:
+    """Quantize the model's Linear layers in place (group-wise, MLX native)."""
+    import mlx.nn as nn
+    
+    def is_quantizable(path: str, module) -> bool:
+        return isinstance(module, nn.Linear) and module.weight.shape[-1] % PARAKEET_QUANTIZE_GROUP_SIZE == 0
+    
+    try:
+        nn.quantize(
+            model,
+            group_size=PARAKEET_QUANTIZE_GROUP_SIZE,
+            bits=PARAKEET_QUANTIZE_BITS,
+            class_predicate=is_quantizable,
+        )
+        sys.stderr.write(f"[STT] Quantized Linear layers to {PARAKEET_QUANTIZE_BITS}-bit\n")
+    except Exception as e:
+        # Keep the full-precision model rather than failing startup
+        sys.stderr.write(f"[STT] Quantization skipped: {e}\n")
+    sys.stderr.flush()
+
+
+_UNK_RE = re.compile(r'<unk>')
+_WS_RE = re.compile(r'\s+')
+
+
 def _filter_unk_tokens(text: str) -> str:
     """
     Remove <unk> tokens from Parakeet output.
     These appear when the model can't recognize audio (noise, silence, unclear speech).
     """
-    import re
-    # Remove <unk> tokens and normalize whitespace
-    filtered = re.sub(r'<unk>', '', text)
+    # Fast path: most chunks contain no <unk> at all
+    if '<unk>' in text:
+        text = _UNK_RE.sub('', text)
     # Clean up multiple spaces left by removal
-    filtered = re.sub(r'\s+', ' ', filtered)
-    return filtered.strip()
+    return _WS_RE.sub(' ', text).strip()
+
+
+# RAM-backed directory for the temp WAV fallback when one exists (a user-created
+# RAM disk on macOS, /dev/shm on Linux); None uses the default temp dir
+_TEMP_AUDIO_DIR = next(
+    (d for d in ('/Volumes/RAMDisk', '/dev/shm') if os.path.isdir(d) and os.access(d, os.W_OK)),
+    None,
+)
 
 
 def _transcribe_audio(audio: np.ndarray) -> str:
@@ -455,19 +624,34 @@ def _transcribe_audio(audio: np.ndarray) -> str:
     if _model is None:
         raise RuntimeError("Model not loaded")
     
-    temp_path = tempfile.mktemp(suffix='.wav')
-    try:
-        sf.write(temp_path, audio, 16000)
-        result = _model.transcribe(temp_path)
-        raw_text = result.text.strip() if hasattr(result, 'text') else str(result).strip()
-        # Filter out <unk> tokens before returning
-        return _filter_unk_tokens(raw_text)
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    if get_logmel is not None:
+        # Same steps as _model.transcribe(path), minus the WAV write + re-decode:
+        # bfloat16 samples -> log-mel features -> generate
+        mel = get_logmel(mx.array(audio).astype(mx.bfloat16), _model.preprocessor_config)
+        result = _model.generate(mel)[0]
+    else:
+        # delete=False: the model re-opens the file by path after we close it
+        with tempfile.NamedTemporaryFile(suffix='.wav', dir=_TEMP_AUDIO_DIR, delete=False) as f:
+            temp_path = f.name
+        try:
+            sf.write(temp_path, audio, 16000)
+            result = _model.transcribe(temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    raw_text = result.text.strip() if hasattr(result, 'text') else str(result).strip()
+    # Filter out <unk> tokens before returning
+    return _filter_unk_tokens(raw_text)
 
 
-def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: int) -> dict:
+def transcribe_buffer_chunked(
+    pcm_base64: str,
+    session_id: str,
+    total_samples: int,
+    pcm_base64_delta: str = None,
+    delta_start_sample: int = 0,
+) -> dict:
     """
     Transcribe with chunk-and-commit architecture.
     
@@ -478,9 +662,12 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
     4. Returns is_final=True for committed chunks
     
     Args:
-        pcm_base64: Base64-encoded float32 PCM audio at 16kHz
+        pcm_base64: Base64-encoded float32 PCM audio at 16kHz (whole recording)
         session_id: Unique session identifier (for session reset detection)
         total_samples: Total samples in the recording so far
+        pcm_base64_delta: Delta protocol - only the samples from
+            delta_start_sample on; used instead of pcm_base64 when given
+        delta_start_sample: Sample offset of the delta (0 restarts the buffer)
     
     Returns:
         dict with:
@@ -498,8 +685,18 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
     
     try:
         # Decode audio
-        pcm_bytes = base64.b64decode(pcm_base64)
-        full_audio = np.frombuffer(pcm_bytes, dtype=np.float32)
+        if pcm_base64_delta is not None:
+            delta = np.frombuffer(base64.b64decode(pcm_base64_delta), dtype=np.float32)
+            if not _chunk_tracker.append_audio(delta, delta_start_sample):
+                return {
+                    "type": "error",
+                    "error": f"Audio delta out of sync: got start {delta_start_sample}, have {_chunk_tracker.audio_length} samples",
+                    "buffered_samples": _chunk_tracker.audio_length,
+                }
+            full_audio = _chunk_tracker.buffered_audio()
+        else:
+            pcm_bytes = base64.b64decode(pcm_base64)
+            full_audio = np.frombuffer(pcm_bytes, dtype=np.float32)
         
         if len(full_audio) < 4000:  # Less than 250ms
             return {"type": "error", "error": "Audio too short"}
@@ -518,18 +715,24 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
                 "is_final": False,
                 "commit_sample": _chunk_tracker.committed_samples,
                 "inference_time_ms": 0,
-                "audio_duration_ms": int(len(full_audio) / 16000 * 1000)
+                "audio_duration_ms": int(len(full_audio) * MS_PER_SAMPLE)
             }
         
+        # One pass over the uncommitted audio gives both RMS values below:
+        # the tail's, and (head + tail) for the whole region
+        tail_samples = min(SAMPLE_RATE, len(uncommitted_audio))
+        tail_sumsq = sum_of_squares(uncommitted_audio[-tail_samples:])
+        total_sumsq = sum_of_squares(uncommitted_audio[:-tail_samples]) + tail_sumsq
+        
         # Check for pause (silence at end of uncommitted audio)
         # Look at last 1 second of uncommitted audio
-        tail_samples = min(SAMPLE_RATE, len(uncommitted_audio))
-        tail_audio = uncommitted_audio[-tail_samples:]
-        has_pause = _chunk_tracker.detect_silence(tail_audio)
+        has_pause = _chunk_tracker.detect_silence(
+            rms_from_sum_of_squares(tail_sumsq, tail_samples), tail_samples
+        )
         
         # Check for low-volume background noise (above silence, below normal speech)
         # Skip transcription if audio is likely background noise - prevents gibberish
-        if _chunk_tracker.is_low_volume_noise(uncommitted_audio):
+        if _chunk_tracker.is_low_volume_noise(rms_from_sum_of_squares(total_sumsq, len(uncommitted_audio))):
             return {
                 "type": "success",
                 "committed_text": _chunk_tracker.committed_text,
@@ -537,14 +740,26 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
                 "is_final": False,
                 "commit_sample": _chunk_tracker.committed_samples,
                 "inference_time_ms": 0,
-                "audio_duration_ms": int(len(full_audio) / 16000 * 1000),
+                "audio_duration_ms": int(len(full_audio) * MS_PER_SAMPLE),
                 "skipped_low_volume": True
             }
         
-        # Transcribe ONLY uncommitted audio (fast!)
-        inference_start = time.time()
-        partial_text = _transcribe_audio(uncommitted_audio)
-        inference_time_ms = int((time.time() - inference_start) * 1000)
+        # Skip the model if everything since the last inference is silence:
+        # the uncommitted audio only grew by silence, so its text is unchanged
+        processed = _chunk_tracker.last_processed_sample
+        new_audio = full_audio[processed:]
+        if (_chunk_tracker.last_partial_text is not None
+                and uncommitted_start <= processed <= len(full_audio)
+                and rms_from_sum_of_squares(sum_of_squares(new_audio), len(new_audio)) < SILENCE_THRESHOLD):
+            partial_text = _chunk_tracker.last_partial_text
+            inference_time_ms = 0
+        else:
+            # Transcribe ONLY uncommitted audio (fast!)
+            inference_start = time.time()
+            partial_text = _transcribe_audio(uncommitted_audio)
+            inference_time_ms = int((time.time() - inference_start) * 1000)
+            _chunk_tracker.last_partial_text = partial_text
+            _chunk_tracker.last_processed_sample = len(full_audio)
         
         # Check if we should commit
         should_commit = _chunk_tracker.should_commit(total_samples, has_pause)
@@ -565,7 +780,7 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
                 "commit_sample": total_samples,
                 "commit_reason": commit_reason,
                 "inference_time_ms": inference_time_ms,
-                "audio_duration_ms": int(len(uncommitted_audio) / 16000 * 1000)
+                "audio_duration_ms": int(len(uncommitted_audio) * MS_PER_SAMPLE)
             }
         else:
             # Partial result (may change)
@@ -576,7 +791,7 @@ def transcribe_buffer_chunked(pcm_base64: str, session_id: str, total_samples: i
                 "is_final": False,
                 "commit_sample": _chunk_tracker.committed_samples,
                 "inference_time_ms": inference_time_ms,
-                "audio_duration_ms": int(len(uncommitted_audio) / 16000 * 1000)
+                "audio_duration_ms": int(len(uncommitted_audio) * MS_PER_SAMPLE)
             }
         
     except Exception as e:
@@ -600,7 +815,7 @@ def transcribe_buffer(pcm_base64: str) -> dict:
         pcm_bytes = base64.b64decode(pcm_base64)
         audio = np.frombuffer(pcm_bytes, dtype=np.float32)
         
-        audio_duration_ms = int(len(audio) / 16000 * 1000)
+        audio_duration_ms = int(len(audio) * MS_PER_SAMPLE)
         
         if len(audio) < 4000:
             return {"type": "error", "error": "Audio too short"}
@@ -627,6 +842,21 @@ def transcribe_buffer(pcm_base64: str) -> dict:
         return {"type": "error", "error": str(e)}
 
 
+def _resample_to_16k(audio: np.ndarray, sr: int) -> np.ndarray:
+    """Resample mono audio to SAMPLE_RATE as float32."""
+    if soxr is not None:
+        return soxr.resample(audio, sr, SAMPLE_RATE, quality='HQ').astype(np.float32, copy=False)
+    
+    # Linear interpolation fallback (no anti-aliasing)
+    duration = len(audio) / sr
+    target_length = int(duration * SAMPLE_RATE)
+    return np.interp(
+        np.linspace(0, len(audio), target_length),
+        np.arange(len(audio)),
+        audio
+    ).astype(np.float32)
+
+
 def transcribe_file(audio_path: str) -> dict:
     """Transcribe audio file."""
     if not _model_loaded:
@@ -637,23 +867,16 @@ def transcribe_file(audio_path: str) -> dict:
         if not os.path.exists(audio_path):
             return {"type": "error", "error": f"File not found: {audio_path}"}
         
-        audio, sr = sf.read(audio_path)
+        # Decode straight to float32 so the downmix and resample never see float64
+        audio, sr = sf.read(audio_path, dtype='float32')
         
-        if len(audio.shape) > 1:
-            audio = audio.mean(axis=1)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1, dtype=np.float32)
         
-        if sr != 16000:
-            duration = len(audio) / sr
-            target_length = int(duration * 16000)
-            audio = np.interp(
-                np.linspace(0, len(audio), target_length),
-                np.arange(len(audio)),
-                audio
-            ).astype(np.float32)
-        else:
-            audio = audio.astype(np.float32)
+        if sr != SAMPLE_RATE:
+            audio = _resample_to_16k(audio, sr)
         
-        audio_duration_ms = int(len(audio) / 16000 * 1000)
+        audio_duration_ms = int(len(audio) * MS_PER_SAMPLE)
         
         inference_start = time.time()
         text = _transcribe_audio(audio)
@@ -684,6 +907,39 @@ def reset_session():
     return {"type": "success", "message": "Session reset"}
 
 
+# Read buffer for stdin command lines
+STDIN_BUFFER_SIZE = 1 << 20
+
+
+def decode_message(line: bytes) -> dict:
+    """
+    Decode one JSON command line.
+    
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so the main loop
+    catches the stdlib exception either way.
+    """
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def send_message(payload: dict, flush: bool = True) -> None:
+    """
+    Write one JSON response line to stdout.
+    
+    Every command gets exactly one response and the frontend keeps one request
+    in flight, so each response unblocks it and must be flushed. Pass
+    flush=False only for a message that is immediately followed by another
+    in the same group (the startup signals), so the group costs one write.
+    """
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE))
+    else:
+        sys.stdout.buffer.write((json.dumps(payload) + "\n").encode("utf-8"))
+    if flush:
+        sys.stdout.buffer.flush()
+
+
 def main():
     """Main server loop - reads JSON commands from stdin."""
     global _chunk_tracker
@@ -692,31 +948,34 @@ def main():
     sys.stderr.flush()
     
     if initialize():
-        print(json.dumps({
+        send_message({
             "type": "ready",
             "model": "parakeet",
             "status": "loaded",
             "architecture": "chunk-and-commit"
-        }), flush=True)
+        }, flush=False)
         
-        print(json.dumps({
+        send_message({
             "type": "model_loaded",
             "model": "parakeet"
-        }), flush=True)
+        })
     else:
-        print(json.dumps({
+        send_message({
             "type": "error",
             "error": "Failed to load Parakeet model"
-        }), flush=True)
+        })
         sys.exit(1)
     
-    for line in sys.stdin:
+    # Raw byte lines with a large buffer: base64 audio lines are hundreds of KB,
+    # and both orjson and json accept bytes, so no text decode is needed
+    stdin = io.BufferedReader(sys.stdin.buffer.raw, buffer_size=STDIN_BUFFER_SIZE)
+    for line in stdin:
         line = line.strip()
         if not line:
             continue
         
         try:
-            cmd = json.loads(line)
+            cmd = decode_message(line)
             action = cmd.get("action")
             
             if action == "transcribe_buffer_chunked":
@@ -724,52 +983,46 @@ def main():
                 result = transcribe_buffer_chunked(
                     cmd.get("pcm_base64", ""),
                     cmd.get("session_id", "default"),
-                    cmd.get("total_samples", 0)
+                    cmd.get("total_samples", 0),
+                    cmd.get("pcm_base64_delta"),
+                    cmd.get("delta_start_sample", 0)
                 )
-                print(json.dumps(result), flush=True)
+                send_message(result)
             
             elif action == "transcribe_buffer":
                 # Legacy: Simple buffer transcription
                 result = transcribe_buffer(cmd.get("pcm_base64", ""))
-                print(json.dumps(result), flush=True)
+                send_message(result)
             
             elif action == "transcribe_file":
                 result = transcribe_file(cmd.get("audio_path", ""))
-                print(json.dumps(result), flush=True)
+                send_message(result)
             
             elif action == "reset_session":
                 # Reset chunk tracker for new recording
                 result = reset_session()
-                print(json.dumps(result), flush=True)
+                send_message(result)
             
             elif action == "warmup":
-                warmup_path = os.path.join(os.path.dirname(__file__), 'warmup_audio.wav')
-                if os.path.exists(warmup_path):
-                    try:
-                        warmup_audio, rate = sf.read(warmup_path, dtype='float32')
-                    except:
-                        warmup_audio = np.zeros(16000 * 3, dtype=np.float32)
-                else:
-                    warmup_audio = np.zeros(16000 * 3, dtype=np.float32)
-                
+                warmup_audio = get_warmup_audio()
                 warmup_start = time.time()
                 _transcribe_audio(warmup_audio)
                 warmup_time = int((time.time() - warmup_start) * 1000)
-                print(json.dumps({
+                send_message({
                     "type": "warmup_complete",
                     "model": "parakeet",
                     "warmup_time_ms": warmup_time
-                }), flush=True)
+                })
             
             elif action == "ping":
-                print(json.dumps({"type": "pong"}), flush=True)
+                send_message({"type": "pong"})
             
             elif action == "quit":
-                print(json.dumps({"type": "goodbye"}), flush=True)
+                send_message({"type": "goodbye"})
                 break
             
             elif action == "get_models":
-                print(json.dumps({
+                send_message({
                     "type": "models",
                     "models": [{
                         "id": "parakeet",
@@ -780,25 +1033,25 @@ def main():
                     }],
                     "current_model": "parakeet",
                     "architecture": "chunk-and-commit"
-                }), flush=True)
+                })
             
             elif action == "set_model":
-                print(json.dumps({
+                send_message({
                     "type": "success",
                     "message": "Parakeet is the only model",
                     "current_model": "parakeet"
-                }), flush=True)
+                })
             
             else:
-                print(json.dumps({
+                send_message({
                     "type": "error",
                     "error": f"Unknown action: {action}"
-                }), flush=True)
+                })
                 
         except json.JSONDecodeError as e:
-            print(json.dumps({"type": "error", "error": f"Invalid JSON: {e}"}), flush=True)
+            send_message({"type": "error", "error": f"Invalid JSON: {e}"})
         except Exception as e:
-            print(json.dumps({"type": "error", "error": str(e)}), flush=True)
+            send_message({"type": "error", "error": str(e)})
 
 
 if __name__ == "__main__":
@@ -5,7 +5,7 @@ Tests with both silence and speech-like audio to verify warmup effectiveness.
 """
 
 import numpy as np
-import tempfile
+import soundfile as sf
 import time
 import os
 import sys
@@ -19,25 +19,24 @@ print("=" * 60)
 
 # Test 1: Load model fresh (simulates cold start)
 print("\n[1] Loading Parakeet model from scratch...")
-load_start = time.time()
+load_start = time.perf_counter_ns()
 
-from parakeet_mlx import from_pretrained
-model = from_pretrained("mlx-community/parakeet-tdt-0.6b-v3")
-load_time = (time.time() - load_start) * 1000
+import mlx.core as mx
+from parakeet_mlx.audio import get_logmel
+from stt_server import load_model
+model = load_model()
+load_time = (time.perf_counter_ns() - load_start) / 1e6
 print(f"    Model load time: {load_time:.0f}ms")
 
 # Helper function
 def transcribe(audio_data):
     """Transcribe audio and return time + result."""
-    import soundfile as sf
-    temp_path = tempfile.mktemp(suffix='.wav')
-    sf.write(temp_path, audio_data, 16000)
+    # Same in-memory path as stt_server (no temp WAV write + re-decode)
+    start = time.perf_counter_ns()
+    mel = get_logmel(mx.array(audio_data).astype(mx.bfloat16), model.preprocessor_config)
+    result = model.generate(mel)[0]
+    elapsed = (time.perf_counter_ns() - start) / 1e6
     
-    start = time.time()
-    result = model.transcribe(temp_path)
-    elapsed = (time.time() - start) * 1000
-    
-    os.unlink(temp_path)
     # Handle AlignedResult object from parakeet-mlx
     if hasattr(result, 'text'):
         text = result.text.strip()
@@ -62,7 +61,6 @@ print(f"    Time with silence (warm): {time_silence2:.0f}ms")
 print("\n[4] Transcription with 3s speech-like audio...")
 warmup_path = os.path.join(os.path.dirname(__file__), 'warmup_audio.wav')
 if os.path.exists(warmup_path):
-    import soundfile as sf
     warmup_audio, rate = sf.read(warmup_path, dtype='float32')
     time_speech, text = transcribe(warmup_audio)
     print(f"    Time with speech audio: {time_speech:.0f}ms")
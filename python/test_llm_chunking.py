@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Regression tests for long-dictation chunking in llm_server (no models needed).
+
+Run directly or with pytest.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from llm_server import chunk_text_by_paragraphs, chunk_text_evenly
+
+
+def check_chunks(text, chunks):
+    assert chunks, "no chunks"
+    assert all(chunk.strip() for chunk in chunks), f"empty chunk in {chunks!r}"
+    assert " ".join(chunks).split() == text.split(), "words lost or reordered"
+
+
+def test_trailing_paragraph_break():
+    text = "w " * 10 + "\n\n" + "w " * 10 + "\n\n"
+    check_chunks(text, chunk_text_by_paragraphs(text, max_words=10))
+
+
+def test_trailing_space_after_sentence():
+    text = "One two three. Four five six. " * 3
+    check_chunks(text, chunk_text_by_paragraphs(text, max_words=3))
+
+
+def test_leading_paragraph_break():
+    text = "\n\n" + "w " * 12 + "\n\n" + "x " * 5
+    check_chunks(text, chunk_text_by_paragraphs(text, max_words=10))
+
+
+def test_even_chunks_are_trimmed():
+    text = "w " * 10 + "\n\n" + "w " * 10 + "\n\n"
+    chunks = chunk_text_evenly(text, max_words=10)
+    check_chunks(text, chunks)
+    assert all(chunk == chunk.strip() for chunk in chunks), f"untrimmed chunk in {chunks!r}"
+
+
+def main():
+    failed = 0
+    for name, test in sorted(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        try:
+            test()
+            print(f"✅ {name}")
+        except AssertionError as e:
+            print(f"❌ {name}: {e}")
+            failed += 1
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,11 +3,21 @@
 Comprehensive edge case tests for LLM text enhancement
 """
 
+import argparse
 import json
 import os
+import queue
 import subprocess
 import sys
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Same optional C codec the servers use
+except ImportError:
+    orjson = None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # ALL TEST CASES
@@ -254,6 +264,83 @@ TEST_CASES = {
 }
 
 
+# Seconds to wait for the server to load the fast model / answer one test
+SERVER_READY_TIMEOUT = 300
+TEST_TIMEOUT = 120
+
+# Messages that answer a command (everything else is an unsolicited signal
+# like "ready" or "deep_model_loaded"); llm_server answers in FIFO order
+RESPONSE_TYPES = ("polish_result", "error")
+
+
+def start_server():
+    """
+    Start llm_server.py once and keep it warm for every test.
+    
+    stdout lines are parsed on a reader thread into a queue; stderr is drained
+    on another thread (last 20 lines kept) so a chatty log can't fill the pipe
+    and stall the server. Pipes stay binary: responses go to the JSON parser
+    as bytes, and log lines are only decoded if a failure report prints them.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.Popen(
+        ["python3", os.path.join(script_dir, "llm_server.py")],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    
+    messages = queue.Queue()
+    stderr_tail = deque(maxlen=20)
+    
+    def read_stdout():
+        for line in proc.stdout:
+            if line.startswith(b"{"):
+                try:
+                    messages.put(orjson.loads(line) if orjson is not None else json.loads(line))
+                except ValueError:
+                    pass
+        messages.put(None)  # Server exited
+    
+    def read_stderr():
+        for line in proc.stderr:
+            stderr_tail.append(line.rstrip(b"\n"))
+    
+    threading.Thread(target=read_stdout, daemon=True).start()
+    threading.Thread(target=read_stderr, daemon=True).start()
+    return proc, messages, stderr_tail
+
+
+def wait_for(messages, types, timeout):
+    """Next message whose type is in types; None on timeout or server exit."""
+    while True:
+        try:
+            message = messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None or message.get("type") in types:
+            return message
+
+
+def send_command(proc, messages, command):
+    """Send one encoded command line and wait for its response (None if none arrives)."""
+    proc.stdin.write(command)
+    proc.stdin.flush()
+    return wait_for(messages, RESPONSE_TYPES, TEST_TIMEOUT)
+
+
+def forbidden_pattern(words):
+    """
+    One regex matching any of the standalone words/phrases (None if empty).
+    
+    Longest alternatives first, so "so like basically" wins over "like".
+    """
+    if not words:
+        return None
+    alternatives = sorted({re.escape(w.lower()) for w in words}, key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b')
+
+
 def run_test(name, test_case):
     """Run a single test case"""
     cmd = {
@@ -269,33 +356,81 @@ def run_test(name, test_case):
         "mode": test_case["mode"],
         "expected_contains": test_case["expected_contains"],
         "expected_not_contains": test_case["expected_not_contains"],
-        "command": json.dumps(cmd)
+        "expected_contains_lower": [e.lower() for e in test_case["expected_contains"]],
+        "forbidden_re": forbidden_pattern(test_case["expected_not_contains"]),
+        "command": (json.dumps(cmd) + "\n").encode("utf-8")
     }
 
 
 def check_result(test_info, polished):
     """Check if result matches expectations"""
     errors = []
+    polished_lower = polished.lower()
     
     # Check expected_contains
-    for expected in test_info["expected_contains"]:
-        if expected.lower() not in polished.lower():
+    for expected, expected_lower in zip(test_info["expected_contains"], test_info["expected_contains_lower"]):
+        if expected_lower not in polished_lower:
             errors.append(f"Missing: '{expected}'")
     
-    # Check expected_not_contains
-    for not_expected in test_info["expected_not_contains"]:
-        not_expected_lower = not_expected.lower()
-        polished_lower = polished.lower()
-        
-        # Check for standalone filler words
-        pattern = r'\b' + re.escape(not_expected_lower) + r'\b'
-        if re.search(pattern, polished_lower):
-            errors.append(f"Should be removed: '{not_expected}'")
+    # Check expected_not_contains - one scan for all standalone filler words
+    pattern = test_info["forbidden_re"]
+    if pattern is not None:
+        found = set(pattern.findall(polished_lower))
+        for not_expected in test_info["expected_not_contains"]:
+            if not_expected.lower() in found:
+                errors.append(f"Should be removed: '{not_expected}'")
     
     return errors
 
 
+def stop_server(proc):
+    """Ask the server to quit; kill it if it doesn't exit."""
+    if proc.poll() is None:
+        proc.stdin.write(b'{"action": "quit"}\n')
+        proc.stdin.flush()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def run_worker(shard):
+    """
+    Run a shard of (index, test_info) pairs on one warm server.
+    
+    Returns ({index: response dict or failure string}, server log tail).
+    """
+    proc, messages, stderr_tail = start_server()
+    ready = wait_for(messages, ("ready", "error"), SERVER_READY_TIMEOUT)
+    server_ok = ready is not None and ready.get("type") == "ready"
+    
+    results = {}
+    for index, test_info in shard:
+        if not server_ok or proc.poll() is not None:
+            results[index] = "Server not running"
+            continue
+        
+        result = send_command(proc, messages, test_info["command"])
+        if result is None:
+            results[index] = "No response"
+            # A late reply would be taken as the next test's answer
+            server_ok = False
+            continue
+        results[index] = result
+    
+    stop_server(proc)
+    return results, list(stderr_tail)
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="warm llm_server.py processes to spread tests across (each loads its own models)"
+    )
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+    
     print("=" * 70)
     print("LLM EDGE CASE TESTS")
     print("=" * 70)
@@ -306,42 +441,31 @@ def main():
     for name, test_case in TEST_CASES.items():
         tests.append(run_test(name, test_case))
     
-    # Build input for the server
-    commands = "\n".join([t["command"] for t in tests])
-    commands += '\n{"action": "quit"}\n'
-    
-    print(f"Running {len(tests)} tests...")
+    print(f"Running {len(tests)} tests on {workers} server(s)...")
     print()
     
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    proc = subprocess.Popen(
-        ["python3", os.path.join(script_dir, "llm_server.py")],
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
-    
-    stdout, stderr = proc.communicate(commands)
-    
-    # Parse results
-    lines = [l for l in stdout.strip().split("\n") if l.startswith("{")]
+    # Round-robin shards, one warm server each; results are reported in
+    # TEST_CASES order once every shard is done
+    indexed = list(enumerate(tests))
+    shards = [indexed[k::workers] for k in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(run_worker, shards))
     
-    # Skip the ready message
-    result_lines = [l for l in lines if '"type": "ready"' not in l]
+    results = {}
+    for shard_results, _ in outcomes:
+        results.update(shard_results)
     
-    # Match results to tests
     passed = 0
     failed = 0
     
-    for i, test_info in enumerate(tests):
-        if i >= len(result_lines):
-            print(f"❌ {test_info['name']}: No response")
+    for index, test_info in indexed:
+        result = results[index]
+        if isinstance(result, str):
+            print(f"❌ {test_info['name']}: {result}")
             failed += 1
             continue
         
         try:
-            result = json.loads(result_lines[i])
             polished = result.get("polished", "")
             
             errors = check_result(test_info, polished)
@@ -368,9 +492,11 @@ def main():
     print("=" * 70)
     
     if failed > 0:
-        print("\nServer logs (last 20 lines):")
-        for line in stderr.strip().split("\n")[-20:]:
-            print(f"  {line}")
+        for k, (_, stderr_tail) in enumerate(outcomes):
+            label = f" (server {k + 1})" if workers > 1 else ""
+            print(f"\nServer logs{label} (last 20 lines):")
+            for line in stderr_tail:
+                print(f"  {line.decode('utf-8', errors='replace')}")
     
     return 0 if failed == 0 else 1
 
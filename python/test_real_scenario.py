@@ -13,7 +13,6 @@ Goal: Make Recording 1 as fast as Recording 2/3
 
 import time
 import numpy as np
-import tempfile
 import os
 import soundfile as sf
 
@@ -30,29 +29,37 @@ print()
 print("[PHASE 1] APP STARTUP")
 print("-" * 70)
 
-startup_start = time.time()
+startup_start = time.perf_counter_ns()
 
 # 1a. Load model
 print("  Loading Parakeet model...", end=" ", flush=True)
-load_start = time.time()
-from parakeet_mlx import from_pretrained
-model = from_pretrained("mlx-community/parakeet-tdt-0.6b-v3")
-load_time = (time.time() - load_start) * 1000
+load_start = time.perf_counter_ns()
+import mlx.core as mx
+from parakeet_mlx.audio import get_logmel
+from stt_server import WARMUP_CHUNK_SECONDS, load_model
+model = load_model()
+load_time = (time.perf_counter_ns() - load_start) / 1e6
 print(f"{load_time:.0f}ms")
 
+def transcribe(audio):
+    """Transcribe float32 16kHz audio in memory (same path as stt_server)."""
+    mel = get_logmel(mx.array(audio).astype(mx.bfloat16), model.preprocessor_config)
+    return model.generate(mel)[0]
+
 # 1b. Warmup with real speech
 print("  Warming up with real speech...", end=" ", flush=True)
-warmup_start = time.time()
+warmup_start = time.perf_counter_ns()
 warmup_path = os.path.join(SCRIPT_DIR, 'warmup_audio.wav')
 warmup_audio, _ = sf.read(warmup_path, dtype='float32')
-temp = tempfile.mktemp(suffix='.wav')
-sf.write(temp, warmup_audio, 16000)
-_ = model.transcribe(temp)
-os.unlink(temp)
-warmup_time = (time.time() - warmup_start) * 1000
+_ = transcribe(warmup_audio)
+# Same extra chunk lengths stt_server warms at startup, so the 2s recordings
+# below don't pay for first-of-a-size Metal kernels and buffers
+for seconds in WARMUP_CHUNK_SECONDS:
+    _ = transcribe(np.resize(warmup_audio, int(16000 * seconds)))
+warmup_time = (time.perf_counter_ns() - warmup_start) / 1e6
 print(f"{warmup_time:.0f}ms")
 
-total_startup = (time.time() - startup_start) * 1000
+total_startup = (time.perf_counter_ns() - startup_start) / 1e6
 print(f"  TOTAL STARTUP: {total_startup:.0f}ms")
 print()
 
@@ -61,31 +68,26 @@ print("[PHASE 2] USER RECORDINGS")
 print("-" * 70)
 print()
 
-# Load test audio (simulates user speaking)
-test_audio, _ = sf.read(warmup_path, dtype='float32')
+# Test audio (simulates user speaking) - same file as the warmup, already decoded
+test_audio = warmup_audio
+
+# The first chunk of audio (like the AudioWorklet would send), identical for
+# every recording, so it's sliced once
+CHUNK_SECONDS = 2.0
+first_chunk = np.ascontiguousarray(test_audio[:int(16000 * CHUNK_SECONDS)])
 
-def simulate_recording(recording_num, audio_chunk_seconds=2.0):
+def simulate_recording(recording_num, audio_chunk, audio_chunk_seconds=CHUNK_SECONDS):
     """
     Simulates a user recording session.
     
     Returns time from "first audio chunk received" to "first text available"
     This is what the user perceives as "lag" or "responsiveness"
     """
-    # Simulate the first chunk of audio (like the AudioWorklet would send)
-    chunk_samples = int(16000 * audio_chunk_seconds)
-    audio_chunk = test_audio[:chunk_samples]
-    
-    # Write to temp file (simulates the streaming buffer)
-    temp = tempfile.mktemp(suffix='.wav')
-    sf.write(temp, audio_chunk, 16000)
-    
     # === THIS IS THE KEY MEASUREMENT ===
     # Time from "audio ready" to "transcription available"
-    transcribe_start = time.time()
-    result = model.transcribe(temp)
-    transcribe_time = (time.time() - transcribe_start) * 1000
-    
-    os.unlink(temp)
+    transcribe_start = time.perf_counter_ns()
+    result = transcribe(audio_chunk)
+    transcribe_time = (time.perf_counter_ns() - transcribe_start) / 1e6
     
     text = result.text.strip() if hasattr(result, 'text') else ''
     
@@ -100,10 +102,23 @@ def simulate_recording(recording_num, audio_chunk_seconds=2.0):
 results = []
 for i in range(1, 6):
     print(f"  Recording {i}:", end=" ", flush=True)
-    result = simulate_recording(i, audio_chunk_seconds=2.0)
+    result = simulate_recording(i, first_chunk)
     results.append(result)
     print(f"{result['transcribe_ms']:.0f}ms → \"{result['text_preview']}\"")
 
+# Batched path: the same chunks through one generate call. This is the
+# throughput view (offline re-transcription); live dictation stays one chunk
+# per call, so the analysis below uses the sequential numbers
+print(f"  Batched ({len(results)} chunks, one call):", end=" ", flush=True)
+batch_start = time.perf_counter_ns()
+mel = get_logmel(mx.array(first_chunk).astype(mx.bfloat16), model.preprocessor_config)
+if mel.ndim == 2:
+    mel = mx.expand_dims(mel, 0)
+batch_results = model.generate(mx.concatenate([mel] * len(results), axis=0))
+batch_ms = (time.perf_counter_ns() - batch_start) / 1e6
+batch_per_chunk = batch_ms / len(results)
+print(f"{batch_ms:.0f}ms total → {batch_per_chunk:.0f}ms per chunk ({len(batch_results)} results)")
+
 print()
 
 # === PHASE 3: ANALYSIS ===
@@ -121,6 +136,7 @@ print()
 
 gap = first_time - avg_subsequent
 print(f"  GAP (1st vs avg warm):   {gap:+.0f}ms")
+print(f"  Batched per chunk:       {batch_per_chunk:.0f}ms (vs {avg_subsequent:.0f}ms one at a time)")
 print()
 
 if gap < 50:
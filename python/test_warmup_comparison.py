@@ -6,116 +6,194 @@ Measures actual impact on time-to-first-transcription by running
 fresh Python processes for each test case.
 """
 
+import argparse
+import itertools
+import json
+import math
+import random
+import statistics
 import subprocess
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # Same optional C codec the servers use
+except ImportError:
+    orjson = None
 
 PYTHON = "/opt/homebrew/bin/python3.11"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Test script that will be run in fresh processes
-TEST_SCRIPT = '''
-import time
-import numpy as np
-import tempfile
-import os
-import soundfile as sf
-
-# Suppress warnings
-os.environ['MLX_DISABLE_METAL_WARNINGS'] = '1'
-
-WARMUP_TYPE = "{warmup_type}"
-SCRIPT_DIR = "{script_dir}"
-
-print(f"Testing: {{WARMUP_TYPE}} warmup")
-
-# === Phase 1: Load Model ===
-load_start = time.time()
-from parakeet_mlx import from_pretrained
-model = from_pretrained("mlx-community/parakeet-tdt-0.6b-v3")
-load_time = (time.time() - load_start) * 1000
-print(f"  Model load: {{load_time:.0f}}ms")
-
-# === Phase 2: Warmup (the variable we're testing) ===
-warmup_start = time.time()
-temp = tempfile.mktemp(suffix='.wav')
-
-if WARMUP_TYPE == "silence":
-    # Current baseline: 1 second of silence
-    warmup_audio = np.zeros(16000, dtype=np.float32)
-elif WARMUP_TYPE == "real_speech":
-    # New approach: real TTS speech
-    warmup_path = os.path.join(SCRIPT_DIR, 'warmup_audio.wav')
-    warmup_audio, _ = sf.read(warmup_path, dtype='float32')
-
-sf.write(temp, warmup_audio, 16000)
-_ = model.transcribe(temp)
-os.unlink(temp)
-warmup_time = (time.time() - warmup_start) * 1000
-print(f"  Warmup: {{warmup_time:.0f}}ms")
-
-# === Phase 3: Simulate user's first recording ===
-# This is what matters - how fast is the FIRST real transcription after warmup?
-# We use a 2-second clip of the warmup audio to simulate ~2s of user speech
-
-test_start = time.time()
-temp = tempfile.mktemp(suffix='.wav')
-
-# Use real speech for the test (simulating user speaking)
-test_path = os.path.join(SCRIPT_DIR, 'warmup_audio.wav')
-test_audio, _ = sf.read(test_path, dtype='float32')
-test_audio = test_audio[:32000]  # First 2 seconds
-
-sf.write(temp, test_audio, 16000)
-result = model.transcribe(temp)
-first_transcription_time = (time.time() - test_start) * 1000
-os.unlink(temp)
-
-text = result.text.strip() if hasattr(result, 'text') else str(result)
-print(f"  First transcription: {{first_transcription_time:.0f}}ms")
-print(f"  Result: \\"{{text[:50]}}...\\"")
-
-# === Phase 4: Second transcription (should be consistently fast) ===
-temp = tempfile.mktemp(suffix='.wav')
-sf.write(temp, test_audio, 16000)
-second_start = time.time()
-_ = model.transcribe(temp)
-second_time = (time.time() - second_start) * 1000
-os.unlink(temp)
-print(f"  Second transcription: {{second_time:.0f}}ms")
-
-# Output summary for parsing
-print(f"RESULT:{{WARMUP_TYPE}}:{{load_time:.0f}}:{{warmup_time:.0f}}:{{first_transcription_time:.0f}}:{{second_time:.0f}}")
-'''
-
-def run_test(warmup_type):
-    """Run a test in a fresh Python process."""
-    script = TEST_SCRIPT.format(warmup_type=warmup_type, script_dir=SCRIPT_DIR)
-    
-    result = subprocess.run(
-        [PYTHON, "-c", script],
-        capture_output=True,
+# Seconds one arm may run (first runs may download the model) before it's killed
+DEFAULT_ARM_TIMEOUT = 600
+
+# Module (python/warmup_worker.py) run in a fresh process per arm; -m with
+# cwd=SCRIPT_DIR picks it up and reuses its __pycache__ bytecode
+WORKER_MODULE = "warmup_worker"
+
+# Prefix of the worker's one-line JSON result
+RESULT_SENTINEL = "RESULT_JSON:"
+
+decode_result = orjson.loads if orjson is not None else json.loads
+
+def run_test(warmup_type, mlx_jit=False, prefix="", timeout=DEFAULT_ARM_TIMEOUT, prefetch_weights=False):
+    """
+    Run a test in a fresh Python process (prefix tags its echoed output).
+    
+    Returns the parsed RESULT with status "ok", {"status": "timeout"} if the
+    process was killed for exceeding timeout, or None if it exited without one.
+    """
+    cmd = [PYTHON, "-u", "-m", WORKER_MODULE, warmup_type, SCRIPT_DIR]
+    if mlx_jit:
+        cmd.append("--mlx-jit")
+    if prefetch_weights:
+        cmd.append("--prefetch-weights")
+    
+    # Stream the child's output (stderr merged, -u so it isn't block-buffered)
+    # and parse RESULT as it arrives instead of holding the whole run in memory
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
+        bufsize=1,
         cwd=SCRIPT_DIR
     )
     
-    output = result.stdout + result.stderr
-    print(output)
-    
-    # Parse results
-    for line in output.split('\n'):
-        if line.startswith('RESULT:'):
-            parts = line.split(':')
-            return {
-                'warmup_type': parts[1],
-                'load_ms': int(parts[2]),
-                'warmup_ms': int(parts[3]),
-                'first_transcription_ms': int(parts[4]),
-                'second_transcription_ms': int(parts[5])
-            }
-    return None
+    # Watchdog: a hung arm (e.g. stuck in a Metal compile) is terminated, which
+    # closes its stdout and ends the loop below
+    timed_out = threading.Event()
+    
+    def kill_on_timeout():
+        timed_out.set()
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    
+    watchdog = threading.Timer(timeout, kill_on_timeout)
+    watchdog.daemon = True
+    watchdog.start()
+    
+    parsed = None
+    for line in proc.stdout:
+        print(prefix + line, end="", flush=True)
+        if line.startswith(RESULT_SENTINEL):
+            parsed = decode_result(line[len(RESULT_SENTINEL):])
+            parsed['status'] = 'ok'
+    proc.wait()
+    watchdog.cancel()
+    
+    if timed_out.is_set() and parsed is None:
+        print(f"{prefix}✗ {warmup_type} timed out after {timeout}s - killed")
+        return {'warmup_type': warmup_type, 'status': 'timeout'}
+    return parsed
+
+METRIC_KEYS = ('import_ms', 'load_ms', 'mlx_jit_ms', 'warmup_ms', 'first_transcription_ms', 'second_transcription_ms')
+
+
+def run_arm(warmup_type, runs, mlx_jit=False, prefix="", timeout=DEFAULT_ARM_TIMEOUT, prefetch_weights=False):
+    """
+    Run one arm `runs` times, each in its own fresh process.
+    
+    Returns the per-metric medians (None if no run produced a RESULT), the
+    raw first-transcription times, and their quartiles when there are
+    enough runs for them.
+    Timed-out runs are left out of the medians and counted in "timeouts".
+    """
+    results = []
+    timeouts = 0
+    for i in range(runs):
+        run_prefix = f"{prefix}[run {i + 1}/{runs}] " if runs > 1 else prefix
+        result = run_test(warmup_type, mlx_jit, run_prefix, timeout, prefetch_weights)
+        if result and result['status'] == 'ok':
+            results.append(result)
+        elif result:
+            timeouts += 1
+    if not results:
+        return None
+    
+    summary = {key: statistics.median(r[key] for r in results) for key in METRIC_KEYS}
+    summary['runs'] = len(results)
+    summary['timeouts'] = timeouts
+    summary['first_transcription_runs'] = [r['first_transcription_ms'] for r in results]
+    if len(results) >= 2:
+        q1, _, q3 = statistics.quantiles([r['first_transcription_ms'] for r in results], n=4)
+        summary['first_transcription_iqr'] = (q1, q3)
+    return summary
+
+
+# Significance level for the verdict, and the most label shuffles to try
+# before sampling them at random instead of enumerating every split
+SIGNIFICANCE_LEVEL = 0.05
+MAX_EXACT_PERMUTATIONS = 20000
+
+def permutation_p_value(a, b):
+    """
+    Two-sided permutation test on the difference of medians of two
+    independent samples (each run is its own process, so nothing pairs up).
+    
+    Exact when the number of splits is small, Monte Carlo otherwise.
+    Returns None when either side has fewer than 2 runs.
+    """
+    if len(a) < 2 or len(b) < 2:
+        return None
+    pooled = a + b
+    observed = abs(statistics.median(a) - statistics.median(b))
+    
+    def extreme(indices):
+        chosen = set(indices)
+        left = [pooled[i] for i in chosen]
+        right = [pooled[i] for i in range(len(pooled)) if i not in chosen]
+        return abs(statistics.median(left) - statistics.median(right)) >= observed - 1e-9
+    
+    if math.comb(len(pooled), len(a)) <= MAX_EXACT_PERMUTATIONS:
+        outcomes = [extreme(indices) for indices in itertools.combinations(range(len(pooled)), len(a))]
+        return sum(outcomes) / len(outcomes)
+    
+    rng = random.Random(0)
+    hits = sum(extreme(rng.sample(range(len(pooled)), len(a))) for _ in range(MAX_EXACT_PERMUTATIONS))
+    # +1 on both sides counts the observed split, so p is never 0
+    return (hits + 1) / (MAX_EXACT_PERMUTATIONS + 1)
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Silence vs real speech warmup A/B test")
+    parser.add_argument(
+        "--mlx-jit", action="store_true",
+        help="run and time an encoder-only MLX warmup on dummy input before each arm's warmup"
+    )
+    parser.add_argument(
+        "--prefetch-weights", action="store_true",
+        help="madvise(WILLNEED) the cached model weights on a background thread at worker "
+             "startup so disk reads overlap imports (lowers Model Load in both arms)"
+    )
+    parser.add_argument(
+        "--compile-only", action="store_true",
+        help="add arm C: encoder/decoder/joint on dummy input, no transcription, to separate "
+             "kernel compilation from the data path"
+    )
+    parser.add_argument(
+        "--parallel", action="store_true",
+        help="run both arms at once to save wall-clock time; they share the GPU, so absolute "
+             "timings are inflated (use the default serial mode for reference numbers)"
+    )
+    parser.add_argument(
+        "--timeout", type=int, default=DEFAULT_ARM_TIMEOUT,
+        help=f"seconds before a hung arm is killed and reported as timed out (default {DEFAULT_ARM_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1,
+        help="fresh-process runs per arm; the summary reports medians (and the IQR of the "
+             "first transcription) to keep one-off cold-start outliers from deciding the verdict; "
+             "with 2+ runs a permutation test gates it too (5+ runs are needed to reach p < 0.05)"
+    )
+    args = parser.parse_args()
+    runs = max(1, args.runs)
+    
     print("=" * 70)
     print("A/B TEST: Warmup Strategy Comparison")
     print("=" * 70)
@@ -124,32 +202,62 @@ def main():
     print("Each test runs in a FRESH Python process (true cold start)")
     print()
     
-    # Test A: Silence warmup (baseline)
-    print("-" * 70)
-    print("TEST A: Silence Warmup (1 second of silence)")
-    print("-" * 70)
-    result_silence = run_test("silence")
-    
-    print()
-    
-    # Test B: Real speech warmup
-    print("-" * 70)
-    print("TEST B: Real Speech Warmup (TTS audio)")
-    print("-" * 70)
-    result_speech = run_test("real_speech")
+    if args.parallel:
+        # Both fresh processes at once; output lines are tagged per arm
+        print("-" * 70)
+        print("TESTS A + B" + (" + C" if args.compile_only else "") + " in parallel: Silence vs Real Speech Warmup")
+        print("-" * 70)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            future_silence = executor.submit(run_arm, "silence", runs, args.mlx_jit, "[A] ", args.timeout, args.prefetch_weights)
+            future_speech = executor.submit(run_arm, "real_speech", runs, args.mlx_jit, "[B] ", args.timeout, args.prefetch_weights)
+            if args.compile_only:
+                future_compile = executor.submit(run_arm, "compile_only", runs, args.mlx_jit, "[C] ", args.timeout, args.prefetch_weights)
+            result_silence = future_silence.result()
+            result_speech = future_speech.result()
+            result_compile = future_compile.result() if args.compile_only else None
+    else:
+        # Test A: Silence warmup (baseline)
+        print("-" * 70)
+        print("TEST A: Silence Warmup (1 second of silence)")
+        print("-" * 70)
+        result_silence = run_arm("silence", runs, args.mlx_jit, timeout=args.timeout, prefetch_weights=args.prefetch_weights)
+        
+        print()
+        
+        # Test B: Real speech warmup
+        print("-" * 70)
+        print("TEST B: Real Speech Warmup (TTS audio)")
+        print("-" * 70)
+        result_speech = run_arm("real_speech", runs, args.mlx_jit, timeout=args.timeout, prefetch_weights=args.prefetch_weights)
+        
+        result_compile = None
+        if args.compile_only:
+            print()
+            
+            # Test C: Kernel compilation only
+            print("-" * 70)
+            print("TEST C: Compile-only Warmup (dummy encoder/decoder/joint pass)")
+            print("-" * 70)
+            result_compile = run_arm("compile_only", runs, args.mlx_jit, timeout=args.timeout, prefetch_weights=args.prefetch_weights)
     
     # Summary comparison
     print()
     print("=" * 70)
-    print("COMPARISON SUMMARY")
+    print("COMPARISON SUMMARY" + (f" (median of {runs} runs per arm)" if runs > 1 else ""))
     print("=" * 70)
     print()
-    print(f"{'Metric':<30} {'Silence':<15} {'Real Speech':<15} {'Difference':<15}")
-    print("-" * 70)
+    print(f"{'Metric':<30} {'Silence':<15} {'Real Speech':<15} {'Difference':<15}"
+          + (f" {'Compile Only':<15}" if result_compile else ""))
+    print("-" * (86 if result_compile else 70))
     
     if result_silence and result_speech:
         metrics = [
-            ('Model Load', 'load_ms'),
+            ('Imports', 'import_ms'),
+            ('Model Load (from_pretrained)', 'load_ms'),
+        ]
+        if args.mlx_jit:
+            metrics.append(('MLX JIT (dummy input)', 'mlx_jit_ms'))
+        metrics += [
             ('Warmup Time', 'warmup_ms'),
             ('1st Transcription (USER)', 'first_transcription_ms'),
             ('2nd Transcription', 'second_transcription_ms'),
@@ -159,8 +267,21 @@ def main():
             silence_val = result_silence[key]
             speech_val = result_speech[key]
             diff = speech_val - silence_val
-            diff_str = f"{diff:+d}ms" if diff != 0 else "same"
-            print(f"{label:<30} {silence_val:>10}ms {speech_val:>10}ms {diff_str:>15}")
+            diff_str = f"{diff:+.1f}ms" if round(diff, 1) != 0 else "same"
+            compile_str = f" {result_compile[key]:>13.1f}ms" if result_compile else ""
+            print(f"{label:<30} {silence_val:>10.1f}ms {speech_val:>10.1f}ms {diff_str:>15}{compile_str}")
+        
+        if 'first_transcription_iqr' in result_silence and 'first_transcription_iqr' in result_speech:
+            print()
+            print("1st transcription IQR:")
+            print(f"  Silence: {result_silence['first_transcription_iqr'][0]:.1f}-{result_silence['first_transcription_iqr'][1]:.1f}ms "
+                  f"({result_silence['runs']} runs)")
+            print(f"  Speech:  {result_speech['first_transcription_iqr'][0]:.1f}-{result_speech['first_transcription_iqr'][1]:.1f}ms "
+                  f"({result_speech['runs']} runs)")
+        
+        for label, result in (("Silence", result_silence), ("Speech", result_speech), ("Compile", result_compile)):
+            if result and result['timeouts']:
+                print(f"  ⚠ {label}: {result['timeouts']} run(s) timed out and were excluded")
         
         print()
         print("=" * 70)
@@ -168,25 +289,47 @@ def main():
         print("=" * 70)
         
         first_diff = result_speech['first_transcription_ms'] - result_silence['first_transcription_ms']
+        p_value = permutation_p_value(result_silence['first_transcription_runs'], result_speech['first_transcription_runs'])
+        if p_value is not None:
+            print(f"Permutation test on 1st transcription medians: p = {p_value:.3f}")
         
-        if first_diff < -100:
-            print(f"✓ REAL SPEECH WARMUP IS FASTER by {-first_diff}ms for first transcription!")
+        if p_value is not None and p_value >= SIGNIFICANCE_LEVEL:
+            # The ±100ms threshold alone can't tell a real gap from run-to-run noise
+            print(f"≈ No significant difference ({first_diff:+.1f}ms, p ≥ {SIGNIFICANCE_LEVEL})")
+            print("  → Both approaches perform similarly (more --runs may resolve it)")
+        elif first_diff < -100:
+            print(f"✓ REAL SPEECH WARMUP IS FASTER by {-first_diff:.1f}ms for first transcription!")
             print("  → User will see first text sooner")
         elif first_diff > 100:
-            print(f"✗ Real speech warmup is SLOWER by {first_diff}ms")
+            print(f"✗ Real speech warmup is SLOWER by {first_diff:.1f}ms")
             print("  → But may have other benefits (kernel compilation)")
         else:
-            print(f"≈ No significant difference ({first_diff:+d}ms)")
+            print(f"≈ No significant difference ({first_diff:+.1f}ms)")
             print("  → Both approaches perform similarly")
         
+        if result_compile:
+            # Same ±100ms threshold, against the silence baseline
+            compile_diff = result_compile['first_transcription_ms'] - result_silence['first_transcription_ms']
+            if compile_diff < -100:
+                print(f"✓ Compile-only warmup beats silence by {-compile_diff:.1f}ms for first transcription")
+            elif compile_diff > 100:
+                print(f"✗ Compile-only warmup is SLOWER than silence by {compile_diff:.1f}ms")
+                print("  → Its dummy shapes miss kernels the real transcription still has to compile")
+            else:
+                print(f"≈ Compile-only warmup matches silence ({compile_diff:+.1f}ms)")
+        
         # Calculate total time to first transcription from app start
-        total_silence = result_silence['load_ms'] + result_silence['warmup_ms'] + result_silence['first_transcription_ms']
-        total_speech = result_speech['load_ms'] + result_speech['warmup_ms'] + result_speech['first_transcription_ms']
+        # mlx_jit_ms is 0 unless --mlx-jit ran that phase
+        total_silence = result_silence['import_ms'] + result_silence['load_ms'] + result_silence['mlx_jit_ms'] + result_silence['warmup_ms'] + result_silence['first_transcription_ms']
+        total_speech = result_speech['import_ms'] + result_speech['load_ms'] + result_speech['mlx_jit_ms'] + result_speech['warmup_ms'] + result_speech['first_transcription_ms']
         
         print()
-        print(f"Total time (load + warmup + 1st transcription):")
-        print(f"  Silence: {total_silence}ms")
-        print(f"  Speech:  {total_speech}ms")
+        print(f"Total time (imports + load + warmup + 1st transcription):")
+        print(f"  Silence: {total_silence:.1f}ms")
+        print(f"  Speech:  {total_speech:.1f}ms")
+        if result_compile:
+            total_compile = result_compile['import_ms'] + result_compile['load_ms'] + result_compile['mlx_jit_ms'] + result_compile['warmup_ms'] + result_compile['first_transcription_ms']
+            print(f"  Compile: {total_compile:.1f}ms")
 
 if __name__ == "__main__":
     main()
@@ -9,6 +9,10 @@ import sys
 import json
 import os
 import re
+import base64
+import functools
+import struct
+import time
 import platform
 from pathlib import Path
 
@@ -32,11 +36,98 @@ except ImportError as e:
     print(json.dumps({"type": "error", "error": f"Missing dependency: {e}"}), flush=True)
     sys.exit(1)
 
+try:
+    import orjson  # C JSON codec for base64 audio response lines
+except ImportError:
+    orjson = None
+
+# Set to "1" to log every realtime chunk to stderr and append first-chunk
+# timing events to DEBUG_LOG_PATH (stderr is line-buffered, so per-chunk
+# lines need no explicit flush)
+TTS_DEBUG_ENV = "RIFT_TTS_DEBUG"
+TTS_DEBUG = os.environ.get(TTS_DEBUG_ENV) == "1"
+DEBUG_LOG_PATH = os.environ.get("RIFT_TTS_DEBUG_LOG", '/Users/mikkokiiskila/Code/playground/.cursor/debug.log')
+_debug_log = None
+
 # Global model cache
 _model = None
 _pipeline = None
 _model_id = "prince-canuma/Kokoro-82M"
 
+# Quantize Kokoro's Linear layers at load; RIFT_TTS_QUANTIZE_BITS=4|8|none
+# overrides (none keeps the published weights). 8-bit is close to lossless for
+# speech; convolutions, LSTMs and the whole decoder (the iSTFTNet vocoder,
+# AdaIN style projections included) keep full precision, since reduced
+# precision there risks overflow and phase drift.
+KOKORO_QUANTIZE_OPTIONS = {"4": 4, "8": 8, "none": None}
+_quantize_setting = os.environ.get("RIFT_TTS_QUANTIZE_BITS", "8").lower()
+if _quantize_setting not in KOKORO_QUANTIZE_OPTIONS:
+    sys.stderr.write(f"[TTS Server] Ignoring RIFT_TTS_QUANTIZE_BITS={_quantize_setting!r} (expected 4, 8 or none), using 8\n")
+    _quantize_setting = "8"
+KOKORO_QUANTIZE_BITS = KOKORO_QUANTIZE_OPTIONS[_quantize_setting]
+KOKORO_QUANTIZE_GROUP_SIZE = 64
+# Module paths left at full precision (the vocoder)
+KOKORO_QUANTIZE_SKIP_PREFIXES = ("decoder.",)
+
+# Chunks handed to one pipeline call in streaming mode. KokoroPipeline takes
+# a list of texts and loads the voice pack once per call; an error only drops
+# the rest of its own group
+STREAM_BATCH_SIZE = 4
+
+# Recent inputs kept by the pure text transforms, so a retried or repeated
+# request skips re-parsing (bounded for a long-lived server)
+TEXT_CACHE_SIZE = 32
+
+# RIFF/WAVE header for 16-bit mono PCM (realtime chunks)
+WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Text-processing patterns, compiled once instead of looked up per call
+_HEADING_RE = re.compile(r'^#{1,3}\s+(.+)$')
+_BULLET_RE = re.compile(r'^[\-\*•]\s+(.+)$')
+_NUMBERED_RE = re.compile(r'^(\d+)[\.\)]\s+(.+)$')
+_BULLET_PREFIX_RE = re.compile(r'^[\-\*•]\s+')
+_NUMBERED_PREFIX_RE = re.compile(r'^\d+[\.\)]')
+_DOT_RUN_RE = re.compile(r'\.{3,}')
+_DOT_BEFORE_PAUSE_RE = re.compile(r'\.\s*\.\.\.')
+_PAUSE_RUN_RE = re.compile(r'\.\.\.(\s*\.\.\.)+')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+_NEWLINES_RE = re.compile(r'\n+')
+_WS_RE = re.compile(r'\s+')
+_CLAUSE_BREAK_RE = re.compile(r'[.!?,;:]')
+
+
+def debug_event(location: str, message: str, data: dict):
+    """Append one event to the debug log (opened once, line-buffered)"""
+    global _debug_log
+    if _debug_log is None:
+        _debug_log = open(DEBUG_LOG_PATH, 'a', buffering=1)
+    _debug_log.write(json.dumps({"location": f"tts_server.py:{location}", "message": message, "data": data, "timestamp": int(time.time()*1000), "sessionId": "debug-session", "hypothesisId": "F,G"}) + '\n')
+
+
+def _quantize_model(model) -> None:
+    """Quantize the model's Linear layers outside the vocoder in place (group-wise, MLX native)."""
+    import mlx.nn as nn
+    
+    def is_quantizable(path: str, module) -> bool:
+        return (
+            isinstance(module, nn.Linear)
+            and module.weight.shape[-1] % KOKORO_QUANTIZE_GROUP_SIZE == 0
+            and not path.startswith(KOKORO_QUANTIZE_SKIP_PREFIXES)
+        )
+    
+    try:
+        nn.quantize(
+            model,
+            group_size=KOKORO_QUANTIZE_GROUP_SIZE,
+            bits=KOKORO_QUANTIZE_BITS,
+            class_predicate=is_quantizable,
+        )
+        sys.stderr.write(f"[TTS Server] Quantized Linear layers to {KOKORO_QUANTIZE_BITS}-bit\n")
+    except Exception as e:
+        # Keep the full-precision model rather than failing startup
+        sys.stderr.write(f"[TTS Server] Quantization skipped: {e}\n")
+    sys.stderr.flush()
+
 
 def initialize_model():
     """Load model into memory - only done once"""
@@ -46,6 +137,8 @@ def initialize_model():
         sys.stderr.write("[TTS Server] Loading model...\n")
         sys.stderr.flush()
         _model = load_model(_model_id)
+        if KOKORO_QUANTIZE_BITS is not None:
+            _quantize_model(_model)
         _pipeline = KokoroPipeline(lang_code="a", model=_model, repo_id=_model_id)
         sys.stderr.write("[TTS Server] Model loaded!\n")
         sys.stderr.flush()
@@ -65,41 +158,65 @@ def initialize_model():
         for _ in _pipeline(warmup_text, voice="af_heart", speed=1.0, 
                            split_pattern=r'(?<=[.!?,;:])\s+'):
             pass  # Just run through the generator to warm up
+        
+        # Also warm the realtime fast-path shape: a short first segment
+        # synthesized without split_pattern, exactly as synthesize_realtime
+        # sends it, so the first request's opening words don't hit cold paths
+        first_segment, _ = get_first_segment(warmup_text, max_chars=25)
+        if first_segment:
+            for _ in _pipeline(first_segment, voice="af_heart", speed=1.0):
+                pass
         sys.stderr.write("[TTS Server] Warmup complete - ready for instant TTS!\n")
         sys.stderr.flush()
     
     return _pipeline
 
 
+# Spoken prefixes for numbered list items ("First, ...")
+_ORDINALS = {
+    '1': 'First', '2': 'Second', '3': 'Third', '4': 'Fourth', 
+    '5': 'Fifth', '6': 'Sixth', '7': 'Seventh', '8': 'Eighth'
+}
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
 def transform_to_natural_speech(text: str) -> str:
     """
     Transform structured text (markdown-like) into natural speech.
     Preserves meaning while making it sound like a human reading aloud.
     """
-    lines = text.split('\n')
+    # Iterate with a one-line lookahead so each line is stripped only once.
+    # split('\n') rather than splitlines(): the latter also breaks on \x0c,
+    # \x85, \u2028 and friends, which would change where pauses land.
+    lines = iter(text.split('\n'))
     result_parts = []
-    
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    append = result_parts.append
+    line = ''
+    next_line = next(lines).strip()
+    
+    while next_line is not None:
+        # Keep the previous stripped line for list-series detection
+        prev_line = line
+        line = next_line
+        next_line = next(lines, None)
+        if next_line is not None:
+            next_line = next_line.strip()
         
         if not line:
             # Empty line = paragraph break, add pause
             if result_parts and not result_parts[-1].endswith('...'):
-                result_parts.append('...')
-            i += 1
+                append('...')
             continue
         
         # Detect markdown headings (# Heading or ## Heading)
-        heading_match = re.match(r'^#{1,3}\s+(.+)$', line)
+        heading_match = _HEADING_RE.match(line)
         if heading_match:
             heading_text = heading_match.group(1).strip()
             # Add pause before heading if not first
             if result_parts:
-                result_parts.append('...')
-            result_parts.append(heading_text + '.')
-            result_parts.append('...')
-            i += 1
+                append('...')
+            append(heading_text + '.')
+            append('...')
             continue
         
         # Detect if line looks like a heading (short, followed by content)
@@ -107,117 +224,163 @@ def transform_to_natural_speech(text: str) -> str:
             len(line) < 50 and 
             not line.endswith('.') and 
             not line.startswith(('-', '*', '•', '1', '2', '3')) and
-            i + 1 < len(lines) and 
-            lines[i + 1].strip()
+            next_line
         )
         
         if is_likely_heading:
             if result_parts:
-                result_parts.append('...')
-            result_parts.append(line + '.')
-            result_parts.append('...')
-            i += 1
+                append('...')
+            append(line + '.')
+            append('...')
             continue
         
         # Detect bullet points or numbered lists
-        bullet_match = re.match(r'^[\-\*•]\s+(.+)$', line)
-        number_match = re.match(r'^(\d+)[\.\)]\s+(.+)$', line)
+        bullet_match = _BULLET_RE.match(line)
         
         if bullet_match:
             content = bullet_match.group(1).strip()
             # Check if this is the first bullet in a series
-            prev_was_bullet = i > 0 and re.match(r'^[\-\*•]\s+', lines[i-1].strip())
-            if not prev_was_bullet and result_parts:
-                result_parts.append('...')
+            if result_parts and not _BULLET_PREFIX_RE.match(prev_line):
+                append('...')
             # Add the bullet content with natural pacing
             if not content.endswith(('.', '!', '?')):
                 content += '.'
-            result_parts.append(content)
-            i += 1
+            append(content)
             continue
         
+        number_match = _NUMBERED_RE.match(line)
+        
         if number_match:
             num = number_match.group(1)
             content = number_match.group(2).strip()
             # Check if first numbered item
-            prev_was_numbered = i > 0 and re.match(r'^\d+[\.\)]', lines[i-1].strip())
-            if not prev_was_numbered and result_parts:
-                result_parts.append('...')
+            if result_parts and not _NUMBERED_PREFIX_RE.match(prev_line):
+                append('...')
             # Natural reading: "First, ..." or "Number one, ..."
-            ordinals = {
-                '1': 'First', '2': 'Second', '3': 'Third', '4': 'Fourth', 
-                '5': 'Fifth', '6': 'Sixth', '7': 'Seventh', '8': 'Eighth'
-            }
-            prefix = ordinals.get(num, f'Number {num}')
+            prefix = _ORDINALS.get(num) or f'Number {num}'
             if not content.endswith(('.', '!', '?')):
                 content += '.'
-            result_parts.append(f'{prefix}, {content}')
-            i += 1
+            append(f'{prefix}, {content}')
             continue
         
         # Regular text - just add it
-        result_parts.append(line)
-        i += 1
+        append(line)
     
     # Join and clean up
     result = ' '.join(result_parts)
     
-    # Clean up multiple pauses
-    result = re.sub(r'\.{3,}', '...', result)
-    result = re.sub(r'\.\s*\.\.\.', '...', result)
-    result = re.sub(r'\.\.\.(\s*\.\.\.)+', '...', result)
+    # Clean up multiple pauses (all three patterns need a "...", so flat
+    # prose with no pause skips them after one substring check)
+    if '...' in result:
+        result = _DOT_RUN_RE.sub('...', result)
+        result = _DOT_BEFORE_PAUSE_RE.sub('...', result)
+        result = _PAUSE_RUN_RE.sub('...', result)
     
     # Clean up spacing
-    result = re.sub(r'\s+', ' ', result)
+    result = _WS_RE.sub(' ', result)
     result = result.strip()
     
     return result
 
 
+class _NonPrintableTable(dict):
+    """
+    str.translate table that deletes non-printable characters. Filled lazily
+    per code point seen (a full table would cover all of Unicode).
+    """
+    def __missing__(self, codepoint):
+        value = codepoint if chr(codepoint).isprintable() else None
+        self[codepoint] = value
+        return value
+
+
+_NON_PRINTABLE_TABLE = _NonPrintableTable()
+
+
+def strip_nonprintable(text: str) -> str:
+    """Drop non-printable characters (space counts as printable)"""
+    # Common case: one C-level check, no copy
+    if text.isprintable():
+        return text
+    return text.translate(_NON_PRINTABLE_TABLE)
+
+
+# Unicode/markup -> speakable replacements for sanitize_for_tts
+_TTS_REPLACEMENTS = {
+    '→': 'leads to',
+    '←': 'comes from', 
+    '↔': 'goes both ways',
+    '•': '',  # Handled in structure parsing
+    '–': '-',
+    '—': ', ',
+    '"': '"',
+    '"': '"',
+    ''': "'",
+    ''': "'",
+    '`': '',
+    '**': '',
+    '*': '',
+    '_': '',
+    '#': '',
+    '```': '',
+    '\\n': ' ',
+    '\\t': ' ',
+    '<': 'less than',
+    '>': 'greater than',
+    '&': 'and',
+    '@': 'at',
+    '%': 'percent',
+    '$': 'dollars',
+    '€': 'euros',
+    '£': 'pounds',
+}
+
+# One alternation, longest key first so '```' and '**' win over '`' and '*'
+_TTS_REPLACEMENTS_RE = re.compile('|'.join(
+    re.escape(key) for key in sorted(_TTS_REPLACEMENTS, key=len, reverse=True)
+))
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
 def sanitize_for_tts(text: str) -> str:
     """Final cleanup for TTS - handle special characters"""
-    # Replace unicode with speakable equivalents
-    replacements = {
-        '→': 'leads to',
-        '←': 'comes from', 
-        '↔': 'goes both ways',
-        '•': '',  # Handled in structure parsing
-        '–': '-',
-        '—': ', ',
-        '"': '"',
-        '"': '"',
-        ''': "'",
-        ''': "'",
-        '`': '',
-        '**': '',
-        '*': '',
-        '_': '',
-        '#': '',
-        '```': '',
-        '\\n': ' ',
-        '\\t': ' ',
-        '<': 'less than',
-        '>': 'greater than',
-        '&': 'and',
-        '@': 'at',
-        '%': 'percent',
-        '$': 'dollars',
-        '€': 'euros',
-        '£': 'pounds',
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+    # Replace unicode with speakable equivalents (one pass over the text)
+    text = _TTS_REPLACEMENTS_RE.sub(lambda m: _TTS_REPLACEMENTS[m.group()], text)
     
     # Remove any remaining non-printable characters except basic punctuation
-    text = ''.join(char for char in text if char.isprintable() or char == ' ')
+    text = strip_nonprintable(text)
     
     # Clean up spacing
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     return text.strip()
 
 
+def pack_pieces(pieces: list, separator: str, budget: int) -> list:
+    """
+    Greedily join consecutive pieces with separator into chunks whose joined
+    length stays within budget (a piece longer than budget gets a chunk of
+    its own). Empty pieces are skipped.
+    """
+    chunks = []
+    buf = []
+    buf_len = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        if buf and buf_len + len(separator) + len(piece) > budget:
+            chunks.append(separator.join(buf))
+            buf = []
+            buf_len = 0
+        if buf:
+            buf_len += len(separator)
+        buf.append(piece)
+        buf_len += len(piece)
+    if buf:
+        chunks.append(separator.join(buf))
+    return chunks
+
+
 def split_into_chunks(text: str, max_chars: int = 400) -> list:
     """
     Split text into natural speech chunks.
@@ -240,49 +403,42 @@ def split_into_chunks(text: str, max_chars: int = 400) -> list:
         return [text]
     
     # Try to split at natural pause points (...)
-    # This preserves the semantic chunks we created
-    pause_chunks = text.split('...')
-    
+    # This preserves the semantic chunks we created. Chunks are built as
+    # lists of parts with a running length and joined once, so packing is
+    # linear in the text length.
     chunks = []
-    current_chunk = ""
+    current_parts = []
+    current_len = 0  # len("... ".join(current_parts))
     
-    for part in pause_chunks:
+    for part in text.split('...'):
         part = part.strip()
         if not part:
             continue
             
         # If this part fits in current chunk, add it
-        if len(current_chunk) + len(part) + 4 <= max_chars:  # +4 for "... "
-            if current_chunk:
-                current_chunk += "... " + part
-            else:
-                current_chunk = part
-        else:
-            # Save current chunk and start new one
-            if current_chunk:
-                chunks.append(current_chunk)
-            
-            # If this single part is too long, split by sentences
-            if len(part) > max_chars:
-                sentences = re.split(r'(?<=[.!?])\s+', part)
-                sub_chunk = ""
-                for sentence in sentences:
-                    if len(sub_chunk) + len(sentence) + 1 <= max_chars:
-                        sub_chunk += sentence + " "
-                    else:
-                        if sub_chunk.strip():
-                            chunks.append(sub_chunk.strip())
-                        sub_chunk = sentence + " "
-                if sub_chunk.strip():
-                    current_chunk = sub_chunk.strip()
-                else:
-                    current_chunk = ""
-            else:
-                current_chunk = part
+        if current_len + len(part) + 4 <= max_chars:  # +4 for "... "
+            if current_parts:
+                current_len += 4
+            current_parts.append(part)
+            current_len += len(part)
+            continue
+        
+        # Save current chunk and start new one
+        if current_parts:
+            chunks.append("... ".join(current_parts))
+        
+        # If this single part is too long, split by sentences; the last
+        # sentence group stays open for the parts that follow
+        if len(part) > max_chars:
+            sentence_chunks = pack_pieces(_SENTENCE_SPLIT_RE.split(part), " ", max_chars - 1)
+            chunks.extend(sentence_chunks[:-1])
+            part = sentence_chunks[-1]
+        current_parts = [part]
+        current_len = len(part)
     
     # Don't forget the last chunk
-    if current_chunk.strip():
-        chunks.append(current_chunk.strip())
+    if current_parts:
+        chunks.append("... ".join(current_parts))
     
     # Filter and clean
     chunks = [c.strip() for c in chunks if c and c.strip()]
@@ -309,30 +465,40 @@ def synthesize(text: str, voice: str = "af_heart", speed: float = 1.0, output_fi
         sys.stderr.write(f"[TTS Server] Synthesizing: {processed_text[:100]}...\n")
         sys.stderr.flush()
         
-        # Collect all audio chunks
-        all_audio = []
-        
-        for _, _, audio in pipeline(processed_text, voice=voice, speed=speed, split_pattern=r'\.\.\.'):
-            if audio is not None and len(audio) > 0:
-                all_audio.append(audio[0])
-        
-        if not all_audio:
+        # Stream each segment straight into the output file as it arrives
+        # (opened on the first segment), instead of collecting every segment
+        # and concatenating them into one more full-length copy
+        total_samples = 0
+        writer = None
+        try:
+            for _, _, audio in pipeline(processed_text, voice=voice, speed=speed, split_pattern=r'\.\.\.'):
+                if audio is None or len(audio) == 0:
+                    continue
+                segment = np.asarray(audio[0])
+                if output_file:
+                    if writer is None:
+                        output_path = Path(output_file)
+                        output_path.parent.mkdir(parents=True, exist_ok=True)
+                        writer = sf.SoundFile(str(output_path), 'w', samplerate=sample_rate, channels=1)
+                    writer.write(segment)
+                total_samples += len(segment)
+        except Exception:
+            # Don't leave a truncated file behind
+            if writer is not None:
+                writer.close()
+                Path(output_file).unlink(missing_ok=True)
+            raise
+        if writer is not None:
+            writer.close()
+        
+        if total_samples == 0:
             return {"type": "error", "error": "No audio generated"}
         
-        # Concatenate all audio chunks
-        combined_audio = np.concatenate(all_audio)
-        
-        # Save to file
-        if output_file:
-            output_path = Path(output_file)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            sf.write(str(output_path), combined_audio, sample_rate)
-        
         return {
             "type": "success",
             "output_file": output_file,
             "sample_rate": sample_rate,
-            "duration": len(combined_audio) / sample_rate
+            "duration": total_samples / sample_rate
         }
         
     except Exception as e:
@@ -356,14 +522,13 @@ def get_first_segment(text: str, max_chars: int = 25) -> tuple:
     if len(text) <= max_chars:
         return None, text
     
-    # Look for natural break point within max_chars
-    for i, char in enumerate(text[:max_chars]):
-        if char in '.!?,;:':
-            # Include the punctuation in first segment
-            first = text[:i+1].strip()
-            rest = text[i+1:].strip()
-            if first:  # Ensure we got something
-                return first, rest
+    # Look for natural break point within max_chars (one C-level scan,
+    # no slice of the prefix)
+    match = _CLAUSE_BREAK_RE.search(text, 0, max_chars)
+    if match:
+        # Include the punctuation in first segment (never empty: it holds
+        # at least the punctuation mark)
+        return text[:match.end()].strip(), text[match.end():].strip()
     
     # No punctuation found - split at last word boundary before max_chars
     space_idx = text.rfind(' ', 0, max_chars)
@@ -377,37 +542,64 @@ def get_first_segment(text: str, max_chars: int = 25) -> tuple:
     return None, text
 
 
+# Markup replacements for sanitize_minimal (realtime path)
+_MINIMAL_REPLACEMENTS = {
+    '```': ' code block ',  # Code blocks
+    '`': '',                # Inline code markers
+    '**': '',               # Bold markers
+    '__': '',               # Underline/bold
+    '\\n': ' ',             # Escaped newlines
+    '\\t': ' ',             # Escaped tabs
+    '\t': ' ',              # Tabs
+}
+
+_MINIMAL_REPLACEMENTS_RE = re.compile('|'.join(
+    re.escape(key) for key in sorted(_MINIMAL_REPLACEMENTS, key=len, reverse=True)
+))
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
 def sanitize_minimal(text: str) -> str:
     """
     Minimal sanitization for realtime TTS - only remove truly problematic characters.
     Preserves most formatting for natural speech flow.
     """
     # Only replace characters that could break TTS or sound unnatural
-    replacements = {
-        '```': ' code block ',  # Code blocks
-        '`': '',                # Inline code markers
-        '**': '',               # Bold markers
-        '__': '',               # Underline/bold
-        '\\n': ' ',             # Escaped newlines
-        '\\t': ' ',             # Escaped tabs
-        '\t': ' ',              # Tabs
-    }
-    
-    for old, new in replacements.items():
-        text = text.replace(old, new)
+    text = _MINIMAL_REPLACEMENTS_RE.sub(lambda m: _MINIMAL_REPLACEMENTS[m.group()], text)
     
     # Convert newlines to spaces (Kokoro will handle sentence boundaries via split_pattern)
-    text = re.sub(r'\n+', ' ', text)
+    text = _NEWLINES_RE.sub(' ', text)
     
     # Collapse multiple spaces
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Remove any non-printable characters
-    text = ''.join(char for char in text if char.isprintable() or char == ' ')
+    text = strip_nonprintable(text)
     
     return text.strip()
 
 
+def encode_wav_base64(audio_data, sample_rate: int) -> str:
+    """
+    Encode a mono float chunk as a base64 16-bit PCM WAV without libsndfile.
+    
+    Samples come out identical to sf.write's PCM_16 default: libsndfile
+    scales to a 32-bit int and shifts down 16 bits, i.e. multiply by 32768
+    and round toward -inf. Out-of-range samples are clipped, and the 44-byte
+    header is prepended directly.
+    """
+    pcm = np.multiply(audio_data, 32768.0, dtype=np.float32)
+    np.floor(pcm, out=pcm)
+    np.clip(pcm, -32768.0, 32767.0, out=pcm)
+    pcm_bytes = pcm.astype(np.int16).tobytes()
+    header = WAV_HEADER.pack(
+        b'RIFF', 36 + len(pcm_bytes), b'WAVE',
+        b'fmt ', 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b'data', len(pcm_bytes)
+    )
+    return base64.b64encode(header + pcm_bytes).decode('ascii')
+
+
 def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0, 
                         request_id: str = "0"):
     """
@@ -419,29 +611,25 @@ def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0,
     This leverages the M-series chip's speed - audio generates faster than realtime,
     so playback can start almost immediately.
     """
-    import base64
-    import io
-    
     try:
-        pipeline = initialize_model()
-        sample_rate = 24000
-        
-        # Minimal sanitization - preserve natural flow
+        # Minimal sanitization - preserve natural flow. Checked before touching
+        # the model so empty/probe requests return at once, even on a cold server
         processed_text = sanitize_minimal(text)
         
-        if not processed_text or not processed_text.strip():
+        if not processed_text:
             yield {"type": "error", "request_id": request_id, "error": "No text to synthesize"}
             return
         
+        pipeline = initialize_model()
+        sample_rate = 24000
+        
         sys.stderr.write(f"[TTS Realtime] Starting: '{processed_text[:80]}...'\n")
         sys.stderr.flush()
         
         # Agent debug log
-        import time as _time
-        _start_time = _time.time()
-        _log_path = '/Users/mikkokiiskila/Code/playground/.cursor/debug.log'
-        with open(_log_path, 'a') as _f:
-            _f.write(json.dumps({"location":"tts_server.py:before_pipeline","message":"Before pipeline call","data":{"text_length":len(processed_text),"text_preview":processed_text[:100]},"timestamp":int(_time.time()*1000),"sessionId":"debug-session","hypothesisId":"F,G"})+'\n')
+        _start_time = time.perf_counter()
+        if TTS_DEBUG:
+            debug_event("before_pipeline", "Before pipeline call", {"text_length": len(processed_text), "text_preview": processed_text[:100]})
         
         chunk_index = 0
         total_duration = 0.0
@@ -461,23 +649,19 @@ def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0,
                     continue
                 
                 # Log first chunk timing
-                if not _first_chunk_logged:
-                    _first_chunk_time = _time.time() - _start_time
-                    with open(_log_path, 'a') as _f:
-                        _f.write(json.dumps({"location":"tts_server.py:first_chunk","message":"First chunk ready","data":{"time_to_first_chunk_ms":int(_first_chunk_time*1000),"text_length":len(processed_text),"fast_path":True},"timestamp":int(_time.time()*1000),"sessionId":"debug-session","hypothesisId":"F,G"})+'\n')
+                if TTS_DEBUG and not _first_chunk_logged:
+                    _first_chunk_time = time.perf_counter() - _start_time
+                    debug_event("first_chunk", "First chunk ready", {"time_to_first_chunk_ms": int(_first_chunk_time*1000), "text_length": len(processed_text), "fast_path": True})
                     _first_chunk_logged = True
                 
                 audio_data = audio[0]
                 duration = len(audio_data) / sample_rate
                 total_duration += duration
                 
-                wav_buffer = io.BytesIO()
-                sf.write(wav_buffer, audio_data, sample_rate, format='WAV')
-                wav_bytes = wav_buffer.getvalue()
-                audio_base64 = base64.b64encode(wav_bytes).decode('utf-8')
+                audio_base64 = encode_wav_base64(audio_data, sample_rate)
                 
-                sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index} (fast-path): {len(audio_data)} samples ({duration:.2f}s)\n")
-                sys.stderr.flush()
+                if TTS_DEBUG:
+                    sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index} (fast-path): {len(audio_data)} samples ({duration:.2f}s)\n")
                 
                 yield {
                     "type": "realtime_chunk",
@@ -505,13 +689,10 @@ def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0,
                     duration = len(audio_data) / sample_rate
                     total_duration += duration
                     
-                    wav_buffer = io.BytesIO()
-                    sf.write(wav_buffer, audio_data, sample_rate, format='WAV')
-                    wav_bytes = wav_buffer.getvalue()
-                    audio_base64 = base64.b64encode(wav_bytes).decode('utf-8')
+                    audio_base64 = encode_wav_base64(audio_data, sample_rate)
                     
-                    sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index}: {len(audio_data)} samples ({duration:.2f}s)\n")
-                    sys.stderr.flush()
+                    if TTS_DEBUG:
+                        sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index}: {len(audio_data)} samples ({duration:.2f}s)\n")
                     
                     yield {
                         "type": "realtime_chunk",
@@ -535,10 +716,9 @@ def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0,
                     continue
                 
                 # Agent debug log - first chunk timing
-                if not _first_chunk_logged:
-                    _first_chunk_time = _time.time() - _start_time
-                    with open(_log_path, 'a') as _f:
-                        _f.write(json.dumps({"location":"tts_server.py:first_chunk","message":"First chunk ready","data":{"time_to_first_chunk_ms":int(_first_chunk_time*1000),"text_length":len(processed_text)},"timestamp":int(_time.time()*1000),"sessionId":"debug-session","hypothesisId":"F,G"})+'\n')
+                if TTS_DEBUG and not _first_chunk_logged:
+                    _first_chunk_time = time.perf_counter() - _start_time
+                    debug_event("first_chunk", "First chunk ready", {"time_to_first_chunk_ms": int(_first_chunk_time*1000), "text_length": len(processed_text)})
                     _first_chunk_logged = True
                 
                 audio_data = audio[0]  # Get the numpy array
@@ -546,13 +726,10 @@ def synthesize_realtime(text: str, voice: str = "af_heart", speed: float = 1.0,
                 total_duration += duration
                 
                 # Convert to WAV in memory and base64 encode
-                wav_buffer = io.BytesIO()
-                sf.write(wav_buffer, audio_data, sample_rate, format='WAV')
-                wav_bytes = wav_buffer.getvalue()
-                audio_base64 = base64.b64encode(wav_bytes).decode('utf-8')
+                audio_base64 = encode_wav_base64(audio_data, sample_rate)
                 
-                sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index}: {len(audio_data)} samples ({duration:.2f}s)\n")
-                sys.stderr.flush()
+                if TTS_DEBUG:
+                    sys.stderr.write(f"[TTS Realtime] Chunk {chunk_index}: {len(audio_data)} samples ({duration:.2f}s)\n")
                 
                 # Yield immediately - no file I/O!
                 yield {
@@ -588,10 +765,8 @@ def synthesize_streaming(text: str, voice: str = "af_heart", speed: float = 1.0,
                          output_dir: str = "/tmp", request_id: str = "0"):
     """Synthesize speech in streaming mode - yields chunks as they're generated (legacy)"""
     try:
-        pipeline = initialize_model()
-        sample_rate = 24000
-        
-        # Split text into manageable chunks (includes sanitization)
+        # Split text into manageable chunks (includes sanitization), before
+        # touching the model so an empty request returns at once
         chunks = split_into_chunks(text)
         total_chunks = len(chunks)
         
@@ -599,56 +774,67 @@ def synthesize_streaming(text: str, voice: str = "af_heart", speed: float = 1.0,
             yield {"type": "error", "request_id": request_id, "error": "No text to synthesize after sanitization"}
             return
         
+        pipeline = initialize_model()
+        sample_rate = 24000
+        
         sys.stderr.write(f"[TTS Server] Streaming {total_chunks} chunks\n")
         sys.stderr.flush()
         
         successful_chunks = 0
         
-        for i, chunk_text in enumerate(chunks):
+        def chunk_message(i, segments):
+            # Save chunk to file (a chunk the pipeline split further arrives
+            # as several segments, joined here into one file)
+            audio_data = segments[0] if len(segments) == 1 else np.concatenate(segments)
+            output_file = f"{output_dir}/tts_stream_{request_id}_{i}.wav"
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            sf.write(str(output_path), audio_data, sample_rate)
+            
+            chunk_text = chunks[i]
+            return {
+                "type": "chunk",
+                "request_id": request_id,
+                "chunk_index": successful_chunks,  # Use successful count for index
+                "total_chunks": total_chunks,
+                "output_file": output_file,
+                "sample_rate": sample_rate,
+                "duration": len(audio_data) / sample_rate,
+                "text": chunk_text[:50] + "..." if len(chunk_text) > 50 else chunk_text
+            }
+        
+        for group_start in range(0, total_chunks, STREAM_BATCH_SIZE):
+            group = chunks[group_start:group_start + STREAM_BATCH_SIZE]
+            sys.stderr.write(f"[TTS Server] Generating chunks {group_start+1}-{group_start+len(group)}/{total_chunks}\n")
+            sys.stderr.flush()
+            
+            # Results come back in text order, tagged with their index in the
+            # group; a new index means the previous chunk is complete
+            current_index = None
+            segments = []
             try:
-                # Skip empty chunks
-                if not chunk_text or not chunk_text.strip():
-                    sys.stderr.write(f"[TTS Server] Skipping empty chunk {i}\n")
-                    continue
-                
-                sys.stderr.write(f"[TTS Server] Generating chunk {i+1}/{total_chunks}: '{chunk_text[:30]}...'\n")
-                sys.stderr.flush()
-                
-                # Generate audio for this chunk
-                audio_data = None
-                
-                for _, _, audio in pipeline(chunk_text, voice=voice, speed=speed, split_pattern=r'\n+'):
-                    audio_data = audio
-                    break
-                
-                if audio_data is None:
-                    sys.stderr.write(f"[TTS Server] Warning: No audio generated for chunk {i}\n")
-                    continue
-                
-                # Save chunk to file
-                output_file = f"{output_dir}/tts_stream_{request_id}_{i}.wav"
-                output_path = Path(output_file)
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                sf.write(str(output_path), audio_data[0], sample_rate)
+                for result in pipeline(group, voice=voice, speed=speed):
+                    audio = result.audio
+                    if audio is None or len(audio) == 0:
+                        continue
+                    if result.text_index != current_index:
+                        if segments:
+                            message = chunk_message(group_start + current_index, segments)
+                            successful_chunks += 1
+                            yield message
+                        current_index = result.text_index
+                        segments = []
+                    segments.append(audio[0])
                 
-                successful_chunks += 1
+                if segments:
+                    message = chunk_message(group_start + current_index, segments)
+                    successful_chunks += 1
+                    yield message
                 
-                # Yield chunk info
-                yield {
-                    "type": "chunk",
-                    "request_id": request_id,
-                    "chunk_index": successful_chunks - 1,  # Use successful count for index
-                    "total_chunks": total_chunks,
-                    "output_file": output_file,
-                    "sample_rate": sample_rate,
-                    "duration": len(audio_data[0]) / sample_rate,
-                    "text": chunk_text[:50] + "..." if len(chunk_text) > 50 else chunk_text
-                }
-                
-            except Exception as chunk_error:
-                sys.stderr.write(f"[TTS Server] Error on chunk {i}: {chunk_error}\n")
+            except Exception as group_error:
+                sys.stderr.write(f"[TTS Server] Error on chunks {group_start+1}-{group_start+len(group)}: {group_error}\n")
                 sys.stderr.flush()
-                # Continue with next chunk instead of failing completely
+                # Continue with next group instead of failing completely
                 continue
         
         # Signal completion
@@ -664,17 +850,43 @@ def synthesize_streaming(text: str, voice: str = "af_heart", speed: float = 1.0,
         yield {"type": "error", "request_id": request_id, "error": f"Streaming synthesis failed: {str(e)}"}
 
 
+def decode_message(line: str) -> dict:
+    """
+    Decode one JSON command line.
+    
+    orjson.JSONDecodeError subclasses json.JSONDecodeError, so the main loop
+    catches the stdlib exception either way.
+    """
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def send_message(payload: dict) -> None:
+    """
+    Write one JSON response line to stdout and flush it.
+    
+    orjson encodes straight to UTF-8 bytes in C, which matters for realtime
+    chunks carrying a base64 WAV each.
+    """
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE))
+    else:
+        sys.stdout.buffer.write((json.dumps(payload) + "\n").encode("utf-8"))
+    sys.stdout.buffer.flush()
+
+
 def main():
     """Main server loop - reads JSON commands from stdin"""
     # Send ready signal
-    print(json.dumps({"type": "ready"}), flush=True)
+    send_message({"type": "ready"})
     
     # Pre-load model immediately for faster first request
     try:
         initialize_model()
-        print(json.dumps({"type": "model_loaded"}), flush=True)
+        send_message({"type": "model_loaded"})
     except Exception as e:
-        print(json.dumps({"type": "error", "error": f"Failed to load model: {e}"}), flush=True)
+        send_message({"type": "error", "error": f"Failed to load model: {e}"})
     
     # Process commands
     for line in sys.stdin:
@@ -683,7 +895,7 @@ def main():
             continue
             
         try:
-            cmd = json.loads(line)
+            cmd = decode_message(line)
             
             if cmd.get("action") == "synthesize":
                 result = synthesize(
@@ -692,7 +904,7 @@ def main():
                     speed=cmd.get("speed", 1.0),
                     output_file=cmd.get("output")
                 )
-                print(json.dumps(result), flush=True)
+                send_message(result)
             
             elif cmd.get("action") == "synthesize_stream":
                 # Legacy streaming mode - send chunks as they're generated
@@ -703,7 +915,7 @@ def main():
                     output_dir=cmd.get("output_dir", "/tmp"),
                     request_id=cmd.get("request_id", "0")
                 ):
-                    print(json.dumps(chunk_result), flush=True)
+                    send_message(chunk_result)
             
             elif cmd.get("action") == "synthesize_realtime":
                 # True realtime streaming - no file I/O, immediate audio delivery
@@ -713,22 +925,22 @@ def main():
                     speed=cmd.get("speed", 1.0),
                     request_id=cmd.get("request_id", "0")
                 ):
-                    print(json.dumps(chunk_result), flush=True)
+                    send_message(chunk_result)
                 
             elif cmd.get("action") == "ping":
-                print(json.dumps({"type": "pong"}), flush=True)
+                send_message({"type": "pong"})
                 
             elif cmd.get("action") == "quit":
-                print(json.dumps({"type": "goodbye"}), flush=True)
+                send_message({"type": "goodbye"})
                 break
                 
             else:
-                print(json.dumps({"type": "error", "error": f"Unknown action: {cmd.get('action')}"}), flush=True)
+                send_message({"type": "error", "error": f"Unknown action: {cmd.get('action')}"})
                 
         except json.JSONDecodeError as e:
-            print(json.dumps({"type": "error", "error": f"Invalid JSON: {e}"}), flush=True)
+            send_message({"type": "error", "error": f"Invalid JSON: {e}"})
         except Exception as e:
-            print(json.dumps({"type": "error", "error": f"Error: {e}"}), flush=True)
+            send_message({"type": "error", "error": f"Error: {e}"})
 
 
 if __name__ == "__main__":
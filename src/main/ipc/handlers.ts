@@ -569,6 +569,9 @@ class STTServer {
   private currentModel = 'whisper';
   private availableModels: STTModel[] = [];
   private startingPromise: Promise<void> | null = null;
+  // Delta protocol: samples of the current session the server already holds
+  private sentSessionId = '';
+  private sentSamples = 0;
 
   async start(): Promise<void> {
     // Already ready - return immediately
@@ -610,6 +613,7 @@ class STTServer {
       this.isReady = false;
       this.modelLoaded = false;
       this.process = null;
+      this.sentSamples = 0;
       this.startingPromise = null;
     });
 
@@ -918,13 +922,20 @@ class STTServer {
       await this.start();
     }
 
-    // Convert Float32Array to base64
-    const buffer = Buffer.from(pcmData.buffer);
-    const pcmBase64 = buffer.toString('base64');
+    // Send only the samples the server doesn't have yet (pcmData is append-only
+    // within a session); start from 0 for a new session or after a failure
+    const deltaStart = sessionId === this.sentSessionId && pcmData.length >= this.sentSamples
+      ? this.sentSamples
+      : 0;
+    const delta = pcmData.subarray(deltaStart);
+    const deltaBase64 = Buffer.from(delta.buffer, delta.byteOffset, delta.byteLength).toString('base64');
+    this.sentSessionId = sessionId;
+    this.sentSamples = pcmData.length;
 
     const cmd = JSON.stringify({
       action: 'transcribe_buffer_chunked',
-      pcm_base64: pcmBase64,
+      pcm_base64_delta: deltaBase64,
+      delta_start_sample: deltaStart,
       session_id: sessionId,
       total_samples: totalSamples
     });
@@ -934,6 +945,7 @@ class STTServer {
         if (this.pendingRequest) {
           console.warn('[STT Server] Chunked transcription timeout (15s)');
           this.pendingRequest = null;
+          this.sentSamples = 0; // Server state unknown - resend everything next time
           resolve({ 
             success: false, 
             committed_text: '',
@@ -962,6 +974,7 @@ class STTServer {
               inference_time_ms: msg.inference_time_ms
             });
           } else {
+            this.sentSamples = 0; // Resync the server's audio buffer on the next call
             resolve({ 
               success: false, 
               committed_text: '',
@@ -975,6 +988,7 @@ class STTServer {
         reject: (err) => {
           clearTimeout(timeoutId);
           this.pendingRequest = null;
+          this.sentSamples = 0;
           resolve({ 
             success: false, 
             committed_text: '',
@@ -998,6 +1012,7 @@ class STTServer {
     if (!this.process || !this.isReady) {
       await this.start();
     }
+    this.sentSamples = 0;
 
     const cmd = JSON.stringify({ action: 'reset_session' });
     